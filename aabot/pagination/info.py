@@ -13,7 +13,7 @@ from aabot.utils.command_utils import ArcanaOption
 from aabot.utils.emoji import character_string, char_ele_emoji, to_emoji
 from aabot.utils.error import BotError
 from aabot.utils.itemcounter import ItemCounter
-from aabot.utils.utils import base_param_text, calculate_base_stat, character_title, param_string
+from aabot.utils.utils import base_param_text, character_title, param_string
 from aabot.utils.assets import CHARACTER_THUMBNAIL
 from common import enums, schemas
 from common.database import SessionAA
@@ -332,34 +332,28 @@ async def skill_detail_ui(character: int, language: enums.LanguageOptions):
                 content_map[skill.name] = pages
     return content_map
 
-async def get_base_stats(level: str, rarity: enums.CharacterRarity, character: schemas.Character|int, potential: schemas.CharacterPotential|None = None) -> schemas.BaseParameters:
-    if isinstance(character, int):
-        character = (await api.fetch_api(
-            api.CHARACTER_INFO_PATH.format(char_id=character),
-            response_model=schemas.Character
-        )).data
-    if not potential:
-        potential = (await api.fetch_api(
-            api.CHARACTER_POTENTIAL_PATH,
-            response_model=schemas.CharacterPotential
-        )).data
+async def get_base_stats(level: str, rarity: enums.CharacterRarity, character: schemas.Character|int) -> schemas.BaseParameters:
+    char_id = character if isinstance(character, int) else character.char_id
 
     if level.isdigit():
         level = f'{int(level)}.0'
     if fullmatch(r'^[1-9]\d*\.\d$', level) is None:
         raise BotError(f'Level {level} is not valid. Example valid inputs. 1, 1.0, 240, 240.0, 240.1...')
     
-    total_stats = potential.levels.get(level)
-    if not total_stats:
-        raise BotError(f'No data for level {level}.')
-    base_rarity = character.rarity
-    coeffs = potential.coefficients[base_rarity][rarity]
+    stats = (await api.fetch_api(
+        api.CHARACTER_STATS_PATH,
+        query_params={'char_id': char_id, 'rarity': rarity.value, 'start': level},
+        response_model=schemas.BaseStatTable
+    )).data
+    if not stats.characters:
+        raise BotError(f'No data for rarity {rarity.name}.')
+    char_stats = stats.characters[0]
 
     return schemas.BaseParameters(
-        str=calculate_base_stat(total_stats, coeffs.m, coeffs.b, character.base_coefficients.str, character.gross_coefficient),
-        dex=calculate_base_stat(total_stats, coeffs.m, coeffs.b, character.base_coefficients.dex, character.gross_coefficient),
-        mag=calculate_base_stat(total_stats, coeffs.m, coeffs.b, character.base_coefficients.mag, character.gross_coefficient),
-        sta=calculate_base_stat(total_stats, coeffs.m, coeffs.b, character.base_coefficients.sta, character.gross_coefficient)
+        str=char_stats.str[0],
+        dex=char_stats.dex[0],
+        mag=char_stats.mag[0],
+        sta=char_stats.sta[0]
     )
 
 async def basestat_ui(character_id: int, level: str, rarity: enums.CharacterRarity, language: enums.LanguageOptions, cs: schemas.CommonStrings) -> BaseContainer:
@@ -176,7 +176,7 @@ async def group_ranking_ui(server: Server, world: int) -> list[BaseContainer]:
         raise BotError("No ranking data found.")
 
     rank = 1
-    timestamp = ranking_data.data[0].timestamp
+    timestamp = ranking_data.data[0].fetch_timestamp or ranking_data.data[0].timestamp
     for batch in batched(ranking_data.data, 50):
         container = MentemoriContainer(f'### Group Rankings [Group {group_id} | {server.name}]')
         rankings = []
@@ -227,7 +227,7 @@ async def guild_ranking_ui(query_params, text)-> list[BaseContainer]:
         raise BotError("No ranking data found.")
 
     rank = 1
-    timestamp = ranking_data.data[0].timestamp
+    timestamp = ranking_data.data[0].fetch_timestamp or ranking_data.data[0].timestamp
     for batch in batched(ranking_data.data, 50):
         container = MentemoriContainer(f'### Guild Rankings [{text}]')
         rankings = []
@@ -254,7 +254,7 @@ async def player_ranking_ui(params, text, category: PlayerCategory, show_all: bo
         raise BotError("No ranking data found.")
 
     rank = 1
-    timestamp = ranking_data[0].timestamp
+    timestamp = ranking_data[0].fetch_timestamp or ranking_data[0].timestamp
     for batch in batched(ranking_data, 50):
         container = MentemoriContainer(f'### Player Rankings by {category.name} [{text}]')
         rankings = []
@@ -295,7 +295,7 @@ async def tower_ranking_ui(params: dict, text: str, category: TowerCategory) ->
         raise BotError("No ranking data found.")
 
     rank = 1
-    timestamp = ranking_data[0].timestamp
+    timestamp = ranking_data[0].fetch_timestamp or ranking_data[0].timestamp
     for batch in batched(ranking_data, 50):
         container = MentemoriContainer(f'### Player Rankings by {category.name} [{text}]')
         rankings = []
@@ -1,5 +1,4 @@
 from io import StringIO
-from itertools import dropwhile
 
 from discord import ui
 
@@ -10,7 +9,8 @@ from aabot.utils.emoji import to_emoji
 from aabot.utils.error import BotError
 from aabot.utils.utils import character_title
 from common.database import SessionAA
-from common.enums import Server
+from common import schemas
+from common.enums import ItemType, Server
 from common.timezones import DailyEvents, time_to_local
 
 async def alias_ui(character: int) -> BaseContainer:
@@ -72,12 +72,9 @@ def get_sublevel(level: float)->tuple[int, int]:
 
     return base, sub
 
-def level_predicate(leveldata, base, sub):
-    if leveldata['PartyLevel'] < base:
-        return True
-    if leveldata['PartySubLevel'] < sub:
-        return True
-    return False
+# (ItemType, ItemId) of the level link orbs
+GREEN_ORB = (ItemType.CharacterTrainingMaterial, 1)
+RED_ORB = (ItemType.CharacterTrainingMaterial, 2)
 
 async def levellink_ui(startlevel: float, endlevel: float|None) -> BaseContainer:
     container = BaseContainer(f'### Level Link Costs')
@@ -94,35 +91,21 @@ async def levellink_ui(startlevel: float, endlevel: float|None) -> BaseContainer
     if startlevel > endlevel:
         raise BotError(f"`startlevel` should be lower than `endlevel`. Got `{startlevel}` and `{endlevel}`.")
 
+    # levels past the max level are rejected by the API with the max level in the message
     link_resp = await api.fetch_api(
-        api.MASTER_PATH.format(mb='LevelLinkMB'),
-        response_model=list[dict]
-    )               
-    link_data_list = link_resp.data
-    
-    max_level = link_data_list[-1]['PartyLevel']
-    if endbase == max_level + 1:
-        endsub = 0
+        api.CHARACTER_LEVEL_LINK_PATH,
+        query_params={'start': f'{startbase}.{startsub}', 'end': f'{endbase}.{endsub}'},
+        response_model=schemas.LevelLinkCost
+    )
+    link_cost = link_resp.data
+    costs = {(item.item_type, item.item_id): item.count for item in link_cost.cost}
+    total_gold = sum(count for (item_type, _), count in costs.items() if item_type == ItemType.Gold)
+    total_gorb = costs.get(GREEN_ORB, 0)
+    total_rorb = costs.get(RED_ORB, 0)
 
-    if startlevel > max_level or endbase > max_level+1:
-        return BaseContainer(f"Max level is {max_level}.9")
-    else:
-        level_data = dropwhile(lambda x: level_predicate(x, startbase, startsub), link_data_list)
-        total_gold = 0
-        total_gorb = 0
-        total_rorb = 0
-        for level in level_data:
-            if level['PartyLevel'] == endbase and level['PartySubLevel'] == endsub:  # end
-                break
-            costs = level['RequiredLevelUpItems']
-            total_gold += costs[0]["ItemCount"]  # gold
-            total_gorb += costs[1]["ItemCount"]  # green orbs
-            if len(costs) == 3:
-                total_rorb += costs[2]["ItemCount"]  # red orbs
-    
     async with SessionAA() as session:
         container.add_item(
-            ui.TextDisplay(f'**__{startbase}.{startsub} -> {endbase}.{endsub}__**')
+            ui.TextDisplay(f'**__{link_cost.start} -> {link_cost.end}__**')
         ).add_item(ui.TextDisplay(
             f'{await to_emoji(session, 'gold')}×{total_gold:,d}\n'
             f'{await to_emoji(session, 'green_orb')}×{total_gorb:,d}\n'
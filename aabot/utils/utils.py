@@ -158,10 +158,6 @@ def make_table(data, header: list[str], style=Literal['thin_compact', 'ascii_sim
         cell_padding=cell_padding
     )
 
-def calculate_base_stat(total, m, b, coefficient, gross):
-    return int((total * m + b) * coefficient / gross)
-
-
 def base_param_text(params: schemas.BaseParameters, cs: schemas.CommonStrings)->str:
     text = (
         f'```json\n'
@@ -4,11 +4,11 @@ from sqlalchemy import select, column, func
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.crud.string_keys import CHARACTER_NAME_KEY, CHARACTER_TITLE_KEY, read_string_key, read_string_key_language_bulk
+from api.crud.string_keys import CHARACTER_NAME_KEY, CHARACTER_TITLE_KEY, read_string_key_language_bulk
 from api.utils.masterdata import MasterData
 from api.utils.error import APIError
 from common.enums import CharacterRarity, Language, LanguageOptions
-from common.models import Alias, AltCharacterORM, CharacterORM, CharacterColumns
+from common.models import Alias, AltCharacterORM, CharacterORM, CharacterColumns, StringORM
 from common.schemas import CharacterDBModel
 
 from api.utils.logger import get_logger
@@ -16,37 +16,38 @@ logger = get_logger(__name__)
 
 # Character table
 async def upsert_chars(session: AsyncSession, md: MasterData):
+    '''Upserts every character in one statement. Returns the ids of new characters in MB order.'''
     char_data = await md.get_MB('CharacterMB')
-    inserted_ids = []
-
-    for char in char_data:
-        rarity = CharacterRarity(char['RarityFlags']).name
-        try:
-            validated_char = CharacterDBModel(**char, base_rarity=rarity)
-            char_dict = validated_char.model_dump()
-            xmax = column('xmax')  # access system column xmax
-            stmt = (
-                insert(CharacterORM)
-                .values(char_dict)
-                .on_conflict_do_update(
-                    index_elements=['id'],
-                    set_={key: char_dict[key] for key in char_dict if key != 'id'}
-                )
-                .returning(
-                    CharacterORM.id,
-                    (xmax == 0).label("inserted")
-                )
+
+    try:
+        char_dicts = [
+            CharacterDBModel(**char, base_rarity=CharacterRarity(char['RarityFlags']).name).model_dump()
+            for char in char_data
+        ]
+        if not char_dicts:
+            return []
+        xmax = column('xmax')  # access system column xmax
+        stmt = insert(CharacterORM).values(char_dicts)
+        stmt = (
+            stmt.on_conflict_do_update(
+                index_elements=['id'],
+                set_={key: getattr(stmt.excluded, key) for key in char_dicts[0] if key != 'id'}
+            )
+            .returning(
+                CharacterORM.id,
+                (xmax == 0).label("inserted")
             )
-            result = await session.execute(stmt)
-            for row in result:
-                if row.inserted:
-                    inserted_ids.append(row.id)
-        except Exception as e:
-            logger.error(f"Failed to update characters - {str(e)}")
-            return None
+        )
+        result = await session.execute(stmt)
+        inserted = {row.id for row in result if row.inserted}
+    except Exception as e:
+        logger.error(f"Failed to update characters - {str(e)}")
+        await session.rollback()
+        return None
 
     await session.commit()
 
+    inserted_ids = [char['id'] for char in char_dicts if char['id'] in inserted]
     logger.info(f"New characters: {inserted_ids}")
 
     return inserted_ids
@@ -88,8 +89,15 @@ async def get_char_ids(session: AsyncSession):
     return result.scalars().all()
 
 # Alt table
-async def insert_alt(session: AsyncSession, char_id: int, base_id: int) -> None:
-    stmt = insert(AltCharacterORM).values(id=char_id, base_id=base_id)
+async def insert_alts(session: AsyncSession, bases: dict[int, int]) -> None:
+    '''bases: character id -> base id'''
+    if not bases:
+        return
+    stmt = (
+        insert(AltCharacterORM)
+        .values([{'id': char_id, 'base_id': base_id} for char_id, base_id in bases.items()])
+        .on_conflict_do_nothing(index_elements=['id'])
+    )
     await session.execute(stmt)
     await session.commit()
 
@@ -127,35 +135,49 @@ async def get_all_alts(session: AsyncSession) -> dict[int, list[int]]:
     result = await session.execute(stmt)
     return {row.base_id: row.alt_ids for row in result}
 
-async def update_alt(session: AsyncSession, char_id: int):
-    char_ids = await get_char_ids(session)
-    keys = {CHARACTER_NAME_KEY.format(id) for id in char_ids}
-    names_ = await read_string_key_language_bulk(session, keys, Language.enus)
-    name_dict = {int(re.search(r'CharacterName(\d+)', key).group(1)): name for key, name in names_.items()}
-    char_name = name_dict.get(char_id)
-    if not char_name:
-        logger.error(f"Character name for id {char_id} not found when updating alt.")
-        return
-    matching_names = {k: v for k, v in name_dict.items() if (v == char_name and k != char_id)}
-    if len(matching_names) == 0:
-        await insert_alt(session, char_id, char_id)
-    else:
-        base = await get_base(session, min(matching_names.keys()))
-        if base:
-            await insert_alt(session, char_id, base.base_id)
-        else: # Alt DB is initalizing
-            if char_id > min(matching_names.keys()):  # matching names excludes self, and base should be lowest
-                logger.error(f"Character {char_id} has no base when it should. Char ID: {char_id}, Matching IDs: {matching_names.keys()}")
-                return
-            await insert_alt(session, char_id, char_id)
+async def get_name_groups(session: AsyncSession) -> dict[str, list[int]]:
+    '''English character name -> ids sharing it, lowest (base) id first'''
+    char_ids = await get_char_ids(session)  # sorted
+    names = await read_string_key_language_bulk(session, [CHARACTER_NAME_KEY.format(id) for id in char_ids], Language.enus)
+    groups: dict[str, list[int]] = {}
+    for char_id in char_ids:
+        if name := names.get(CHARACTER_NAME_KEY.format(char_id)):
+            groups.setdefault(name, []).append(char_id)
+    return groups
+
+async def update_alts(session: AsyncSession, char_ids: list[int]|None = None) -> dict[int, int]:
+    '''
+    Assigns base ids to char_ids (all characters if None) that are not in the alt table yet.
+    Characters with the same English name are alts, the base is the base of the lowest id in the group.
+    Returns character id -> assigned base id.
+    '''
+    groups = await get_name_groups(session)
+    result = await session.execute(select(AltCharacterORM.id, AltCharacterORM.base_id))
+    existing = dict(result.tuples().all())
+    targets = set(char_ids) if char_ids is not None else None
+
+    bases = {}
+    for ids in groups.values():
+        base_id = existing.get(ids[0], ids[0])
+        for char_id in ids:
+            if char_id not in existing and (targets is None or char_id in targets):
+                bases[char_id] = base_id
+
+    if targets is not None and (missing := targets - bases.keys() - existing.keys()):
+        logger.error(f"Character names for ids {sorted(missing)} not found when updating alt.")
+    await insert_alts(session, bases)
+    return bases
 
 
 # Alias table
 # DB tables mainly for AABot use but inserted via API update.
-async def insert_alias(session: AsyncSession, char_id: int, alias: str, is_custom: bool = False) -> Alias:
+async def insert_aliases(session: AsyncSession, aliases: dict[str, int], is_custom: bool = False) -> None:
+    '''aliases: alias -> character id'''
+    if not aliases:
+        return
     stmt = (
         insert(Alias)
-        .values(char_id=char_id, alias=alias, is_custom=is_custom)
+        .values([{'char_id': char_id, 'alias': alias, 'is_custom': is_custom} for alias, char_id in aliases.items()])
         .on_conflict_do_nothing(index_elements=['alias'])  # Only default alias added, some chars have same alias in differtent languages
     )
     await session.execute(stmt)
@@ -165,18 +187,32 @@ def normalize_alias(string: str):
     pattern = r"[^\w\s]"
     return re.sub(pattern, '', string).lower()
 
-async def autoalias(session: AsyncSession, char_id: int):
-    '''Automatically adds default alias.'''
-    serial = len(await find_alts(session, char_id))  # Autoalias should be run after alt update
-    names = await read_string_key(session, CHARACTER_NAME_KEY.format(char_id))
-    titles = await read_string_key(session, CHARACTER_TITLE_KEY.format(char_id))
-    for language in LanguageOptions:
-        char_name = getattr(names, language.name)
-        if not char_name:
-            continue
-        if serial > 1:
-            char_name = f"{char_name}{serial}"
-        await insert_alias(session, char_id, normalize_alias(char_name))
-        if titles:
-            char_title = getattr(titles, language.name)
-            await insert_alias(session, char_id, normalize_alias(char_title))
+async def autoalias(session: AsyncSession, char_ids: list[int]):
+    '''
+    Automatically adds default alias for every supported language.
+    Alts get their position in the name group appended to the name, e.g. amleth2. Run after alt update.
+    '''
+    serials = {
+        char_id: serial
+        for ids in (await get_name_groups(session)).values()
+        for serial, char_id in enumerate(ids, 1)
+    }
+    keys = [key for char_id in char_ids for key in (CHARACTER_NAME_KEY.format(char_id), CHARACTER_TITLE_KEY.format(char_id))]
+    result = await session.execute(select(StringORM).where(StringORM.key.in_(keys)))
+    strings = {string.key: string for string in result.scalars()}
+
+    aliases = {}
+    for char_id in char_ids:
+        names = strings.get(CHARACTER_NAME_KEY.format(char_id))
+        titles = strings.get(CHARACTER_TITLE_KEY.format(char_id))
+        serial = serials.get(char_id, 1)
+        for language in LanguageOptions:
+            char_name = getattr(names, language.name) if names else None
+            if not char_name:
+                continue
+            if serial > 1:
+                char_name = f"{char_name}{serial}"
+            aliases.setdefault(normalize_alias(char_name), char_id)
+            if titles and (char_title := getattr(titles, language.name)):
+                aliases.setdefault(normalize_alias(char_title), char_id)
+    await insert_aliases(session, aliases)
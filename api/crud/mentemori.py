@@ -1,15 +1,55 @@
-from sqlalchemy import select, desc
-from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy import Table, select, desc, text
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import InstrumentedAttribute
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from common.models import PlayerORM, GuildORM, PlayerColumns
+from common.models import PlayerORM, GuildORM, RankingFetchORM, PlayerColumns
 
 from api.utils.logger import get_logger
 logger = get_logger(__name__)
 
+async def copy_upsert(session: AsyncSession, table: Table, rows: list[tuple]) -> int:
+    '''
+    COPYs rows (values in table column order) into a temporary staging table and upserts them by id.
+    Existing rows are only rewritten when a column other than timestamp changed. Commits.
+    Returns the number of inserted or updated rows.
+    '''
+    if not rows:
+        return 0
+    columns = [c.name for c in table.columns]
+    compared = [c for c in columns if c not in ('id', 'timestamp')]
+    staging = f'{table.name}_staging'
+
+    await session.execute(text(f'CREATE TEMPORARY TABLE {staging} (LIKE {table.name}) ON COMMIT DROP'))
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    async with raw_connection.driver_connection.cursor() as cursor:
+        async with cursor.copy(f'COPY {staging} ({', '.join(columns)}) FROM STDIN') as copy:
+            for row in rows:
+                await copy.write_row(row)
+
+    result = await session.execute(text(f'''
+        INSERT INTO {table.name} ({', '.join(columns)})
+        SELECT {', '.join(columns)} FROM {staging}
+        ON CONFLICT (id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in columns if c != 'id')}
+        WHERE ROW({', '.join(f'{table.name}.{c}' for c in compared)}) IS DISTINCT FROM ROW({', '.join(f'excluded.{c}' for c in compared)})
+    '''))
+    await session.commit()
+    return result.rowcount
+
+async def record_fetch(session: AsyncSession, world_id: int, column: str, timestamp: int):
+    '''Sets the fetch time of a world in RankingFetchORM. Does not commit.'''
+    stmt = insert(RankingFetchORM).values(world_id=world_id, **{column: timestamp})
+    stmt = stmt.on_conflict_do_update(index_elements=['world_id'], set_={column: stmt.excluded[column]})
+    await session.execute(stmt)
+
 async def update_players(session: AsyncSession, player_data: dict):
+    '''
+    Commits per world. Unchanged players keep the timestamp of their last change,
+    the fetch time is recorded per world in RankingFetchORM.
+    '''
     timestamp = player_data["timestamp"]
+    changed = 0
 
     for world in player_data["data"]:
         world_id = world["world_id"]
@@ -21,79 +61,71 @@ async def update_players(session: AsyncSession, player_data: dict):
         emerald_ranking = {p["id"]: p["tower_id"] for p in world["rankings"]["tower_green"]}
         amber_ranking = {p["id"]: p["tower_id"] for p in world["rankings"]["tower_yellow"]}
 
-        update_list = []
+        rows = []
         for player_id, player in player_info.items():
             player_id = int(player_id)
-            update_data = {
-                "id": player_id,
-                "world_id": world_id,
-                "name": player["name"],
-                "bp": player["bp"],
-                "rank": player["rank"],
-                "quest_id": player["quest_id"],
-                "tower_id": player["tower_id"],
-                "azure_tower_id": azure_ranking.get(player_id),
-                "crimson_tower_id": crimson_ranking.get(player_id),
-                "emerald_tower_id": emerald_ranking.get(player_id),
-                "amber_tower_id": amber_ranking.get(player_id),
-                "icon_id": player["icon_id"],
-                "guild_id": player["guild_id"],
-                "guild_join_time": player["guild_join_time"],
-                "guild_position": player["guild_position"],
-                "prev_legend_league_class": player["prev_legend_league_class"],
-                "timestamp": timestamp
-            }
+            rows.append((  # PlayerORM column order
+                player_id,
+                world_id,
+                player["name"],
+                player["bp"],
+                player["rank"],
+                player["quest_id"],
+                player["tower_id"],
+                azure_ranking.get(player_id),
+                crimson_ranking.get(player_id),
+                emerald_ranking.get(player_id),
+                amber_ranking.get(player_id),
+                player["icon_id"],
+                player["guild_id"],
+                player["guild_join_time"],
+                player["guild_position"],
+                player["prev_legend_league_class"],
+                timestamp
+            ))
             # Used to be inconsistent, this is a check
             if bp_ranking.get(player_id) and player["bp"] != bp_ranking.get(player_id):
                 logger.error(f"Player {player['name']} has inconsistent BP data: {player['bp']} vs {bp_ranking.get(player_id)}")
-            update_list.append(update_data)
-        stmt = insert(PlayerORM).values(update_list)
-        update_dict = {
-            c.name: getattr(stmt.excluded, c.name) 
-            for c in PlayerORM.__table__.columns 
-            if c.name != 'id'
-            }
-        stmt = stmt.on_conflict_do_update(index_elements=['id'], set_=update_dict)
-        await session.execute(stmt)
+        await record_fetch(session, world_id, 'player_timestamp', timestamp)
+        changed += await copy_upsert(session, PlayerORM.__table__, rows)
+    await session.commit()  # worlds without rows
 
-    await session.commit()
+    logger.info(f'Players updated: {changed}')
 
 async def update_guilds(session: AsyncSession, guild_data: dict):
+    '''
+    Commits per world. Unchanged guilds keep the timestamp of their last change,
+    the fetch time is recorded per world in RankingFetchORM.
+    '''
     timestamp = guild_data["timestamp"]
+    changed = 0
 
     for world in guild_data["data"]:
         world_id = world["world_id"]
         guild_info = world["guild_info"]
 
-        update_list = []
+        rows = []
         for guild_id, guild in guild_info.items():
-            guild_id = int(guild_id)
-            update_data = {
-                "id": guild_id,
-                "world_id": world_id,
-                "name": guild["name"],
-                "bp": guild["bp"],
-                "level": guild["level"],
-                "stock": guild["stock"],
-                "exp": guild["exp"],
-                "num_members": guild["num_members"],
-                "leader_id": guild["leader_id"],
-                "description": guild["description"],
-                "free_join": guild["free_join"],
-                "bp_requirement": guild["bp_requirement"],
-                "timestamp": timestamp
-            }
-            update_list.append(update_data)
-        stmt = insert(GuildORM).values(update_list)
-        update_dict = {
-            c.name: getattr(stmt.excluded, c.name) 
-            for c in GuildORM.__table__.columns 
-            if c.name != 'id'
-            }
-        stmt = stmt.on_conflict_do_update(index_elements=['id'], set_=update_dict)
-        await session.execute(stmt)
-
-    await session.commit()
+            rows.append((  # GuildORM column order
+                int(guild_id),
+                world_id,
+                guild["name"],
+                guild["bp"],
+                guild["level"],
+                guild["stock"],
+                guild["exp"],
+                guild["num_members"],
+                guild["leader_id"],
+                guild["description"],
+                guild["free_join"],
+                guild["bp_requirement"],
+                timestamp
+            ))
+        await record_fetch(session, world_id, 'guild_timestamp', timestamp)
+        changed += await copy_upsert(session, GuildORM.__table__, rows)
+    await session.commit()  # worlds without rows
+
+    logger.info(f'Guilds updated: {changed}')
 
 async def get_top_players(
     session: AsyncSession,
@@ -126,8 +158,9 @@ async def get_top_players(
         PlayerORM.crimson_tower_id,
         PlayerORM.emerald_tower_id,
         PlayerORM.amber_tower_id,
-        PlayerORM.timestamp
-    )
+        PlayerORM.timestamp,
+        RankingFetchORM.player_timestamp.label('fetch_timestamp')
+    ).outerjoin(RankingFetchORM, RankingFetchORM.world_id == PlayerORM.world_id)
 
     if world_id:
         stmt = stmt.where(PlayerORM.world_id.in_(world_id))
@@ -152,8 +185,9 @@ async def get_top_guilds(
         GuildORM.server,
         GuildORM.world,
         GuildORM.bp,
-        GuildORM.timestamp
-    )
+        GuildORM.timestamp,
+        RankingFetchORM.guild_timestamp.label('fetch_timestamp')
+    ).outerjoin(RankingFetchORM, RankingFetchORM.world_id == GuildORM.world_id)
 
     if world_id:
         stmt = stmt.where(GuildORM.world_id.in_(world_id))
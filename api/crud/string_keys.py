@@ -1,13 +1,18 @@
+import asyncio
+import os
 from collections import defaultdict
-from itertools import batched
-from typing import Any
+from collections.abc import Iterable, Mapping, MutableMapping, MutableSequence, Sequence
+from enum import Enum
+from pathlib import Path
+from types import UnionType
+from typing import Annotated, Any, Literal, TypeAliasType, TypeVar, Union, get_args, get_origin
 
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import select, text
 
 from api.utils.masterdata import MasterData
+from common.database import SessionAA
 from common.enums import Language
 from common.models import StringORM
 
@@ -18,69 +23,158 @@ CHARACTER_NAME_KEY = '[CharacterName{}]'
 CHARACTER_TITLE_KEY = '[CharacterSubName{}]'
 UW_DESCRIPTION_KEY = '[EquipmentExclusiveSkill{}Description{}]'
 
-async def upsert_string_keys(session: AsyncSession, md: MasterData, update_list=None):
-    languages = {
-        'JaJp': 'jajp', 
-        'KoKr': 'kokr',
-        'EnUs': 'enus', 
-        'ZhTw': 'zhtw',
-        'DeDe': 'dede',
-        'EsMx': 'esmx', 
-        'FrFr': 'frfr',
-        'IdId': 'idid',
-        'PtBr': 'ptbr', 
-        'RuRu': 'ruru',
-        'ThTh': 'thth',
-        'ViVn': 'vivn', 
-        'ZhCn': 'zhcn'
-    }
+class StringTable:
+    '''
+    In memory copy of string_keys, one {key: text} dict per language loaded on first use.
+    upsert_string_keys touches the stamp file after writing. Every worker sharing the
+    master cache dir sees the new mtime and reloads its languages on next use.
+    '''
+    def __init__(self, stamp_path: Path):
+        self.stamp_path = stamp_path
+        self.tables: dict[Language, tuple[int, dict[str, str|None]]] = {}  # language -> (stamp, strings)
+        self.locks: dict[Language, asyncio.Lock] = defaultdict(asyncio.Lock)
 
+    def _stamp(self) -> int:
+        try:
+            return os.stat(self.stamp_path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    async def get(self, language: Language) -> dict[str, str|None]:
+        '''Do not modify the returned dict'''
+        if not isinstance(language, Language):
+            raise ValueError(f'{language} is not a recognized language')
+        stamp = self._stamp()
+        loaded = self.tables.get(language)
+        if loaded is None or loaded[0] != stamp:
+            async with self.locks[language]:  # one load per language at a time
+                loaded = self.tables.get(language)
+                if loaded is None or loaded[0] != stamp:
+                    loaded = (stamp, await self._load(language))
+                    self.tables[language] = loaded
+        return loaded[1]
+
+    async def _load(self, language: Language) -> dict[str, str|None]:
+        async with SessionAA() as session:
+            result = await session.execute(select(StringORM.key, getattr(StringORM, language)))
+            strings = dict(result.tuples().all())
+        logger.info(f'Loaded {len(strings)} {language} strings')
+        return strings
+
+    async def lookup(self, keys: Iterable[str], language: Language) -> dict[str, str|None]:
+        '''Same as read_string_key_language_bulk, keys not in the table are left out'''
+        strings = await self.get(language)
+        return {key: strings[key] for key in keys if key in strings}
+
+    def invalidate(self) -> None:
+        '''Drops loaded languages here and in every other worker'''
+        self.tables.clear()
+        self.stamp_path.parent.mkdir(parents=True, exist_ok=True)
+        self.stamp_path.touch()
+
+string_table = StringTable(MasterData.CACHE_DIR / 'strings.stamp')
+
+# TextResource{code}MB -> string_keys column
+TEXT_RESOURCE_LANGUAGES = {
+    'JaJp': 'jajp', 
+    'KoKr': 'kokr',
+    'EnUs': 'enus', 
+    'ZhTw': 'zhtw',
+    'DeDe': 'dede',
+    'EsMx': 'esmx', 
+    'FrFr': 'frfr',
+    'IdId': 'idid',
+    'PtBr': 'ptbr', 
+    'RuRu': 'ruru',
+    'ThTh': 'thth',
+    'ViVn': 'vivn', 
+    'ZhCn': 'zhcn'
+}
+
+def _merge_strings_sql(columns: list[str]) -> str:
+    '''
+    Writes staged rows that differ from string_keys and returns them with the old and new text.
+    Rows are compared as a whole first so unchanged keys never reach the insert.
+    '''
+    return f'''
+        WITH changed AS (
+            SELECT s.key, {', '.join(f't.{c} AS old_{c}, s.{c} AS new_{c}' for c in columns)}
+            FROM string_keys_staging s LEFT JOIN string_keys t ON t.key = s.key
+            WHERE t.key IS NULL
+                OR ROW({', '.join(f's.{c}' for c in columns)}) IS DISTINCT FROM ROW({', '.join(f't.{c}' for c in columns)})
+        ), merged AS (
+            INSERT INTO string_keys (key, {', '.join(columns)})
+            SELECT key, {', '.join(f'new_{c}' for c in columns)} FROM changed
+            ON CONFLICT (key) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in columns)}
+        )
+        SELECT * FROM changed
+    '''
+
+async def upsert_string_keys(session: AsyncSession, md: MasterData, update_list=None) -> dict[str, dict[str, tuple[str|None, str|None]]]:
+    '''
+    Syncs string_keys with the TextResource MBs in update_list, all of them if empty.
+    Text is copied into a temporary table and only differing rows are written.
+    Returns {language: {key: (old text, new text)}} of the changed strings.
+    '''
     text_dict = defaultdict(dict)
     updated_languages = []
 
-    for lang_code, db_field in languages.items():
+    for lang_code, db_field in TEXT_RESOURCE_LANGUAGES.items():
         mb = f'TextResource{lang_code}MB'
         if update_list and mb not in update_list:  # Only check updated MB
             continue
         text_data = await md.get_MB(mb)
         updated_languages.append(db_field)
 
-        for text in text_data:
-            key = text.get("StringKey")
-            text = text.get("Text")
-            
-            text_dict[key][db_field] = text
-        
-    values = [
-        {'key': key, **translations}
-        for key, translations in text_dict.items()
-    ]
+        for text_resource in text_data:
+            text_dict[text_resource.get("StringKey")][db_field] = text_resource.get("Text")
+
+    if not text_dict:
+        return {}
 
     try:
-        for batched_values in batched(values, 1000):
-            stmt = insert(StringORM).values(batched_values)
-            update_dict = {
-                c.name: getattr(stmt.excluded, c.name) 
-                for c in StringORM.__table__.columns 
-                if c.name in updated_languages
-                }
-            stmt = stmt.on_conflict_do_update(index_elements=['key'], set_=update_dict)
-            await session.execute(stmt)
+        await session.execute(text(
+            'CREATE TEMPORARY TABLE string_keys_staging '
+            f'(key text PRIMARY KEY, {', '.join(f'{c} text' for c in updated_languages)}) ON COMMIT DROP'
+        ))
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        async with raw_connection.driver_connection.cursor() as cursor:
+            async with cursor.copy(f'COPY string_keys_staging (key, {', '.join(updated_languages)}) FROM STDIN') as copy:
+                for key, translations in text_dict.items():
+                    await copy.write_row((key, *(translations.get(c) for c in updated_languages)))
+        result = await session.execute(text(_merge_strings_sql(updated_languages)))
+        changed_rows = result.mappings().all()
     except Exception as e:
         logger.error(f"Failed to update string keys - {str(e)}")
+        await session.rollback()
+        return {}
 
     await session.commit()
-        
-async def read_all_enus(session: AsyncSession):
-    stmt = select(StringORM.key, StringORM.enus)
-    result = await session.execute(stmt)
-    return result.all()
 
-async def update_and_log_strings(session: AsyncSession, md: MasterData, update_list=None):
-    old_text = await read_all_enus(session)
-    await upsert_string_keys(session, md, update_list)
-    new_text = await read_all_enus(session)
-    return log_text_changes(old_text, new_text, md.version)
+    changes = {}
+    for c in updated_languages:
+        language_changes = {
+            row['key']: (row[f'old_{c}'], row[f'new_{c}'])
+            for row in changed_rows if row[f'old_{c}'] != row[f'new_{c}']
+        }
+        if language_changes:
+            changes[c] = language_changes
+    if changes:
+        string_table.invalidate()
+    logger.info(f'Updated strings: { {c: len(keys) for c, keys in changes.items()} }')
+    return changes
+
+async def update_and_log_strings(session: AsyncSession, md: MasterData, update_list=None) -> dict[str, list[str]]:
+    '''Returns the changed keys per language. English changes are written to the text log.'''
+    changes = await upsert_string_keys(session, md, update_list)
+    if enus_changes := changes.get('enus'):
+        log_text_changes(
+            [(key, old) for key, (old, _) in enus_changes.items()],
+            [(key, new) for key, (_, new) in enus_changes.items()],
+            md.version
+        )
+    return {language: list(language_changes) for language, language_changes in changes.items()}
 
 async def read_string_key(session: AsyncSession, key: str) -> StringORM|None:
     stmt = select(StringORM).where(StringORM.key==key)
@@ -102,46 +196,104 @@ async def read_string_key_language_bulk(session: AsyncSession, keys: set[str], l
     results = await session.execute(stmt)
     return {key: value for key, value in results.all()}
 
+def is_string_key(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith('[') and value.endswith(']')
+
+# translate_keys only descends into models, lists and dict values
+_LIST_TYPES = (list, Sequence, MutableSequence, Iterable)
+_DICT_TYPES = (dict, Mapping, MutableMapping)
+_model_plans: dict[type[BaseModel], tuple[str, ...]] = {}
+_compiling: set[type[BaseModel]] = set()
+
+def _may_hold_keys(annotation: Any) -> bool:
+    '''Whether a value of this annotation can contain a string key. Unknown annotations are assumed to.'''
+    if annotation is str or annotation is Any or annotation is object:
+        return True
+    if isinstance(annotation, TypeAliasType):
+        return _may_hold_keys(annotation.__value__)
+    if isinstance(annotation, TypeVar):
+        return True
+
+    origin = get_origin(annotation)
+    if origin is not None:
+        args = get_args(annotation)
+        if origin is Literal:
+            return any(is_string_key(arg) for arg in args)
+        if origin is Annotated:
+            return _may_hold_keys(args[0])
+        if origin is Union or origin is UnionType:
+            return any(_may_hold_keys(arg) for arg in args)
+        if origin in _LIST_TYPES:
+            return not args or _may_hold_keys(args[0])
+        if origin in _DICT_TYPES:
+            return not args or _may_hold_keys(args[-1])
+        return False  # tuple, set...
+
+    if not isinstance(annotation, type):
+        return True  # unresolved forward reference
+    if issubclass(annotation, BaseModel):
+        # subclasses can be assigned to the field and are only known at runtime
+        return annotation in _compiling or bool(_model_plan(annotation)) or bool(annotation.__subclasses__())
+    if issubclass(annotation, Enum):
+        return False
+    return issubclass(annotation, (str, list, dict)) or annotation in _LIST_TYPES or annotation in _DICT_TYPES
+
+def _model_plan(cls: type[BaseModel]) -> tuple[str, ...]:
+    '''Fields of cls that can hold string keys, compiled once per class'''
+    plan = _model_plans.get(cls)
+    if plan is None:
+        _compiling.add(cls)
+        try:
+            plan = tuple(
+                field_name for field_name, field in cls.model_fields.items()
+                if _may_hold_keys(field.annotation)
+            )
+        finally:
+            _compiling.discard(cls)
+        _model_plans[cls] = plan
+    return plan
+
 async def translate_keys(
     model: Any,
-    db: AsyncSession,
     language: str
 ) -> None:
     """
     Mutates model in place by replacing '[ExampleKey]' values with
-    translations, using a single bulk DB fetch.
+    translations from the in memory string table.
+    Only model fields that can hold string keys are visited, see _model_plan.
     """
 
     key_references: list[tuple[Any, Any, str]] = []  # (container, field/key/index, string_key)
 
     def collect(obj: Any):
         if isinstance(obj, BaseModel):
-            for field_name in obj.__class__.model_fields:
+            for field_name in _model_plan(obj.__class__):
                 value = getattr(obj, field_name)
-                if isinstance(value, str) and value.startswith('[') and value.endswith(']'):
+                if is_string_key(value):
                     key_references.append((obj, field_name, value))
                 else:
                     collect(value)
         elif isinstance(obj, list):
             for i, item in enumerate(obj):
-                if isinstance(item, str) and item.startswith('[') and item.endswith(']'):
+                if is_string_key(item):
                     key_references.append((obj, i, item))
                 else:
                     collect(item)
         elif isinstance(obj, dict):
             for key, value in obj.items():
-                if isinstance(value, str) and value.startswith('[') and value.endswith(']'):
+                if is_string_key(value):
                     key_references.append((obj, key, value))
                 else:
                     collect(value)
 
     collect(model)
+    if not key_references:
+        return
 
-    keys = {string_key for _, _, string_key in key_references}
-    translations = await read_string_key_language_bulk(db, keys, language)
+    translations = await string_table.get(language)
 
     for container, key_or_attr, string_key in key_references:
         if isinstance(container, BaseModel):
             setattr(container, key_or_attr, translations.get(string_key, string_key))
         else:
-            container[key_or_attr] = translations.get(string_key, string_key)
\ No newline at end of file
+            container[key_or_attr] = translations.get(string_key, string_key)
@@ -1,5 +1,6 @@
+import asyncio
 import os
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
@@ -7,7 +8,7 @@ from api.utils.masterdata import MasterData
 from api.utils.error import APIError
 
 from common import models  # DO NOT REMOVE, registers models for Base
-from common.database import Base, engine
+from common.database import Base, engine, SessionAA
 
 from api.utils.logger import get_logger
 logger = get_logger(__name__)
@@ -33,13 +34,25 @@ ADMIN_USERS = [
     {"username": os.getenv('USER_AABOT'), "password": os.getenv('PASSWD_AABOT')}
 ]
 
+async def on_master_update(updated: list[str]):
+    async with SessionAA() as session:
+        await admin.apply_master_update(session, app.state.md, updated)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     # app.state.md = MasterData()  # for testing
     app.state.md = MasterData(preload=True)
+    poller = None
+    if app.state.md.POLL_INTERVAL > 0:
+        poller = asyncio.create_task(app.state.md.poll(on_master_update))
     yield
+    if poller:
+        poller.cancel()
+        with suppress(asyncio.CancelledError):
+            await poller
+    await app.state.md.close()
 
 
 app = FastAPI(
@@ -52,6 +65,12 @@ app = FastAPI(
 async def api_error_handler(request: Request, exc: APIError):
     return JSONResponse(content=exc.to_dict(), status_code=exc.status_code)
 
+@app.middleware('http')
+async def pin_generation(request: Request, call_next):
+    # every MasterData read in a request sees the same version, even across an update
+    request.app.state.md.pin()
+    return await call_next(request)
+
 for router in ROUTERS:
     app.include_router(router)
 
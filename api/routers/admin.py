@@ -4,8 +4,9 @@ from io import StringIO
 from fastapi import APIRouter, HTTPException, Request, Response
 from httpx import AsyncClient
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.crud.character import upsert_chars, get_char_ids, update_alt, autoalias
+from api.crud.character import upsert_chars, update_alts, autoalias
 from api.crud.mentemori import update_guilds, update_players
 from api.crud.string_keys import update_and_log_strings
 from api.utils import mentemori
@@ -21,45 +22,50 @@ DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
 
 router = APIRouter(include_in_schema=False)
 
+async def apply_master_update(session: AsyncSession, md: MasterData, updated: list[str]) -> None:
+    '''Syncs strings and characters from updated MBs and posts the update to discord'''
+    await update_and_log_strings(session, md, updated)
+
+    inserted_ids = []
+    if 'CharacterMB' in updated:
+        inserted_ids = await upsert_chars(session, md)
+        if inserted_ids:  # None when the upsert failed
+            await update_alts(session, inserted_ids)
+            await autoalias(session, inserted_ids)
+
+    files_updated = '\n'.join(updated)
+    
+    msg = StringIO()
+    msg.write(f"**Master version**: {md.version}\n**Files Updated**\n```\n{files_updated}```\n")
+    if inserted_ids is not None:
+        msg.write(f"**Characters Added\n**```{inserted_ids if inserted_ids else 'None'}```\n")
+    else:
+        msg.write("⚠**Failed to update characters.**⚠")
+    embed = {
+        "title": "🔄 Master Update",
+        "description": msg.getvalue(),
+        "color": 0x2ecc71
+    }
+    async with AsyncClient() as client:
+        await client.post(DISCORD_WEBHOOK_URL, json={"embeds": [embed]})
+
 @router.get(routes.UPDATE_PATH)
 async def update_master(key: str, session: SessionDep, request: Request):
-    '''Call only if master data had an update'''
+    '''Call only if master data had an update. Updates are also picked up by the background poller.'''
     if key != os.getenv('API_KEY'):
         raise HTTPException(status_code=403, detail="Unauthorized")
     md: MasterData = request.app.state.md
     try:
         updated = await md.update_version()
-        await update_and_log_strings(session, md, updated)
         
         if not updated:
+            await update_and_log_strings(session, md, updated)
             return Response(status_code=204)
 
         if md.version is None or not md.catalog:  # In case MasterData is not initialized
             updated = await md._preload()
 
-        inserted_ids = []
-        if 'CharacterMB' in updated:
-            inserted_ids = await upsert_chars(session, md)
-            if inserted_ids is not None:  # None is returned when exception occurs
-                for char_id in inserted_ids:
-                    await update_alt(session, char_id)
-                    await autoalias(session, char_id)
-
-        files_updated = '\n'.join(updated)
-        
-        msg = StringIO()
-        msg.write(f"**Master version**: {md.version}\n**Files Updated**\n```\n{files_updated}```\n")
-        if inserted_ids is not None:
-            msg.write(f"**Characters Added\n**```{inserted_ids if inserted_ids else 'None'}```\n")
-        else:
-            msg.write("⚠**Failed to update characters.**⚠")
-        embed = {
-            "title": "🔄 Master Update",
-            "description": msg.getvalue(),
-            "color": 0x2ecc71
-        }
-        async with AsyncClient() as client:
-            await client.post(DISCORD_WEBHOOK_URL, json={"embeds": [embed]})
+        await md.apply_update(updated, lambda updated: apply_master_update(session, md, updated))
         return Response(status_code=204)
         
     except Exception as e:
@@ -91,9 +97,9 @@ async def update_chars(key: str, session: SessionDep, request: Request):
     inserted_ids = await upsert_chars(session, md)
     if inserted_ids is None:
         raise HTTPException(status_code=500, detail='Failed to update characters.')
-    for char_id in inserted_ids:
-        await update_alt(session, char_id)
-        await autoalias(session, char_id)
+    if inserted_ids:
+        await update_alts(session, inserted_ids)
+        await autoalias(session, inserted_ids)
     
     characters_added = inserted_ids if inserted_ids else 'None' 
     embed = {
@@ -110,10 +116,8 @@ async def update_chars(key: str, session: SessionDep, request: Request):
 async def reset_alt(key: str, session: SessionDep):
     if key != os.getenv('API_KEY'):
         raise HTTPException(status_code=403, detail="Unauthorized")
-    char_ids = await get_char_ids(session)
     await session.execute(text('TRUNCATE TABLE alt_characters;'))
-    for char_id in char_ids:
-        await update_alt(session, char_id)
+    await update_alts(session)
     return Response(status_code=204)
 
 @router.get(routes.UPDATE_MENTEMORI_PATH)
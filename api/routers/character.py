@@ -6,9 +6,10 @@ from api.crud.string_keys import translate_keys
 from api.schemas.requests import CharacterDBRequest
 from common.schemas import APIResponse
 from api.schemas.character import (
-    get_character, get_profile, get_lament, get_voicelines, get_memories, get_arcana, get_potential
+    get_character, get_profile, get_lament, get_voicelines, get_memories, get_arcana, get_potential, get_base_stats
 )
-from api.schemas.requests import ArcanaRequest
+from api.schemas.costs import get_level_link_cost
+from api.schemas.requests import ArcanaRequest, BaseStatRequest, LevelLinkRequest
 from api.schemas.skills import get_skills_char
 from api.schemas.string_keys import get_uw_desc_strings
 from api.utils.deps import SessionDep, language_parameter
@@ -43,14 +44,13 @@ async def character_list(
     response_model=APIResponse[schemas.Character]
 )
 async def character(
-    session: SessionDep,
     request: Request,
     char_id: int,
     language: Language = Depends(language_parameter)
 ):
     md: MasterData = request.app.state.md
     char = await get_character(md, char_id)
-    await translate_keys(char, session, language)
+    await translate_keys(char, language)
     return APIResponse[schemas.Character].create(request, char)
 
 @router.get(
@@ -60,14 +60,13 @@ async def character(
     response_model=APIResponse[schemas.Profile]
 )
 async def profile(
-    session: SessionDep,
     request: Request,
     char_id: int,
     language: Language = Depends(language_parameter)
 ):
     md: MasterData = request.app.state.md
     profile = await get_profile(md, char_id)
-    await translate_keys(profile, session, language)
+    await translate_keys(profile, language)
     return APIResponse[schemas.Profile].create(request, profile)
 
 @router.get(
@@ -77,14 +76,13 @@ async def profile(
     response_model=APIResponse[schemas.Lament]
 )
 async def lament(
-    session: SessionDep,
     request: Request,
     char_id: int,
     language: Language = Depends(language_parameter)
 ):
     md: MasterData = request.app.state.md
     lament = await get_lament(md, char_id)
-    await translate_keys(lament, session, language)
+    await translate_keys(lament, language)
     return APIResponse[schemas.Lament].create(request, lament)
 
 @router.get(
@@ -94,7 +92,6 @@ async def lament(
     response_model=APIResponse[schemas.Skills]
 )
 async def skill(
-    session: SessionDep,
     request: Request,
     char_id: int,
     language: Language = Depends(language_parameter)
@@ -102,8 +99,8 @@ async def skill(
     md: MasterData = request.app.state.md
     skills = await get_skills_char(md, char_id)
     if skills.uw_descriptions is None:  # override in case of unreleased character
-        skills.uw_descriptions = await get_uw_desc_strings(session, char_id, language)
-    await translate_keys(skills, session, language)
+        skills.uw_descriptions = await get_uw_desc_strings(char_id, language)
+    await translate_keys(skills, language)
     return APIResponse[schemas.Skills].create(request, skills)
 
 @router.get(
@@ -113,14 +110,13 @@ async def skill(
     response_model=APIResponse[schemas.CharacterVoicelines]
 )
 async def voiceline(
-    session: SessionDep,
     request: Request,
     char_id: int,
     language: Language = Depends(language_parameter)
 ):
     md: MasterData = request.app.state.md
     voicelines = await get_voicelines(md, char_id)
-    await translate_keys(voicelines, session, language)
+    await translate_keys(voicelines, language)
     return APIResponse[schemas.CharacterVoicelines].create(request, voicelines)
 
 @router.get(
@@ -130,14 +126,13 @@ async def voiceline(
     response_model=APIResponse[schemas.CharacterMemories]
 )
 async def memory(
-    session: SessionDep,
     request: Request,
     char_id: int,
     language: Language = Depends(language_parameter)
 ):
     md: MasterData = request.app.state.md
     memories = await get_memories(md, char_id)
-    await translate_keys(memories, session, language)
+    await translate_keys(memories, language)
     return APIResponse[schemas.CharacterMemories].create(request, memories)
 
 @router.get(
@@ -174,7 +169,6 @@ async def alts_by_id(
     response_model=APIResponse[list[schemas.Arcana]]
 )
 async def arcana(
-    session: SessionDep,
     request: Request,
     payload: ArcanaRequest = Depends(),
     language: Language = Depends(language_parameter),
@@ -192,7 +186,7 @@ async def arcana(
     
     if not arcana_data:
         raise HTTPException(status_code=404, detail='No arcana data found with the provided filter conditions')
-    await translate_keys(arcana_data, session, language)
+    await translate_keys(arcana_data, language)
 
     return APIResponse[list[schemas.Arcana]].create(request, arcana_data)
 
@@ -203,7 +197,6 @@ async def arcana(
     response_model=APIResponse[list[schemas.Arcana]]
 )
 async def character_arcana(
-    session: SessionDep,
     request: Request,
     char_id: int,
     language: Language = Depends(language_parameter),
@@ -214,7 +207,7 @@ async def character_arcana(
     
     if not arcana_data:
         raise HTTPException(status_code=404, detail=f'No arcana data found for character {char_id}')
-    await translate_keys(arcana_data, session, language)
+    await translate_keys(arcana_data, language)
 
     return APIResponse[list[schemas.Arcana]].create(request, arcana_data)
 
@@ -242,6 +235,38 @@ async def character_potential(
     md: MasterData = request.app.state.md
     potential = await get_potential(md)
     return APIResponse[schemas.CharacterPotential].create(request, potential)
+
+@router.get(
+    routes.CHARACTER_STATS_PATH,
+    summary='Bulk character base stats',
+    description=(
+        'Returns base stats of all characters, or the given character IDs, for every level from start to end at the given rarity.\n\n'
+        'Characters that cannot reach the rarity are left out. '
+        f'Same formula as {routes.CHARACTER_POTENTIAL_PATH}.'
+    ),
+    response_model=APIResponse[schemas.BaseStatTable]
+)
+async def character_stats(
+    request: Request,
+    payload: BaseStatRequest = Depends()
+):
+    md: MasterData = request.app.state.md
+    stats = await get_base_stats(md, payload)
+    return APIResponse[schemas.BaseStatTable].create(request, stats)
+
+@router.get(
+    routes.CHARACTER_LEVEL_LINK_PATH,
+    summary='Level link costs',
+    description='Returns total items required to level link from start to end level.',
+    response_model=APIResponse[schemas.LevelLinkCost]
+)
+async def level_link_cost(
+    request: Request,
+    payload: LevelLinkRequest = Depends()
+):
+    md: MasterData = request.app.state.md
+    cost = await get_level_link_cost(md, payload.start, payload.end)
+    return APIResponse[schemas.LevelLinkCost].create(request, cost)
     
 # Redirects for old routes
 @router.get('/character/list', include_in_schema=False)
@@ -2,8 +2,8 @@ from fastapi import APIRouter, HTTPException, Request, Depends
 
 from api.crud.string_keys import translate_keys
 from api.schemas import requests
-from api.schemas.equipment import get_equipment, get_upgrade_costs
-from api.utils.deps import SessionDep, language_parameter
+from api.schemas.equipment import get_equipment, get_equipment_plan, get_upgrade_costs
+from api.utils.deps import language_parameter
 from api.utils.masterdata import MasterData
 from common import routes, schemas
 from common.enums import Language
@@ -20,14 +20,13 @@ router = APIRouter()
     response_model=schemas.APIResponse[schemas.Equipment]
 )
 async def search_equipment(
-    session: SessionDep,
     request: Request,
     payload: requests.EquipmentRequest = Depends(),
     language: Language = Depends(language_parameter)
  ):
     md: MasterData = request.app.state.md
     eq = await get_equipment(md, payload)
-    await translate_keys(eq, session, language)
+    await translate_keys(eq, language)
     return schemas.APIResponse[schemas.Equipment].create(request, eq)
 
 @router.get(
@@ -37,14 +36,13 @@ async def search_equipment(
     response_model=schemas.APIResponse[schemas.UniqueWeapon],
 )
 async def search_uw(
-    session: SessionDep,
     request: Request,
     payload: requests.UniqueWeaponRequest = Depends(),
     language: Language = Depends(language_parameter)
 ):
     md: MasterData = request.app.state.md
     eq = await get_equipment(md, payload)
-    await translate_keys(eq, session, language)
+    await translate_keys(eq, language)
     return schemas.APIResponse[schemas.UniqueWeapon].create(request, eq)
 
 @router.get(
@@ -54,16 +52,29 @@ async def search_uw(
     response_model=schemas.APIResponse[schemas.EquipmentCosts]
 )
 async def upgrade_cost(
-    session: SessionDep,
     request: Request,
     payload: requests.EquipmentCostRequest = Depends(),
     language: Language = Depends(language_parameter)
 ):
     md: MasterData = request.app.state.md
     costs = await get_upgrade_costs(md, payload)
-    await translate_keys(costs, session, language)
+    await translate_keys(costs, language)
     return schemas.APIResponse[schemas.EquipmentCosts].create(request, costs)
 
+@router.post(
+    routes.EQUIPMENT_PLAN_PATH,
+    summary='Equipment Build Plan',
+    description='Get the total costs to build multiple equipment at once. Each piece goes from an owned rarity, level and upgrade (or synthesis) to the target equipment and upgrade level.',
+    response_model=schemas.APIResponse[schemas.EquipmentPlan]
+)
+async def build_plan(
+    request: Request,
+    payload: requests.EquipmentPlanRequest
+):
+    md: MasterData = request.app.state.md
+    plan = await get_equipment_plan(md, payload)
+    return schemas.APIResponse[schemas.EquipmentPlan].create(request, plan)
+
 @router.get(
     routes.EQUIPMENT_PATH,
     summary='Equipment',
@@ -71,7 +82,6 @@ async def upgrade_cost(
     response_model=schemas.APIResponse[schemas.Equipment]|schemas.APIResponse[schemas.UniqueWeapon]
 )
 async def equipment(
-    session: SessionDep,
     request: Request,
     eqp_id: int,
     language: Language = Depends(language_parameter)
@@ -79,7 +89,7 @@ async def equipment(
     '''Direct equipment id query'''
     md: MasterData = request.app.state.md
     eq_schema = await get_equipment(md, eqp_id)
-    await translate_keys(eq_schema, session, language)
+    await translate_keys(eq_schema, language)
 
     if isinstance(eq_schema, schemas.UniqueWeapon):
         return schemas.APIResponse[schemas.UniqueWeapon].create(request, eq_schema)
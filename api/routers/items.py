@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, Request
 from api.crud.string_keys import translate_keys
 from api.schemas.items import get_item, get_runes
 from api.schemas.requests import ItemRequest
-from api.utils.deps import SessionDep, language_parameter
+from api.utils.deps import language_parameter
 from api.utils.masterdata import MasterData
 from common import enums, routes, schemas
 
@@ -19,14 +19,13 @@ router = APIRouter()
     response_model=schemas.APIResponse[schemas.Item]
 )
 async def item(
-    session: SessionDep,
     request: Request,
     payload: ItemRequest = Depends(),
     language: enums.Language = Depends(language_parameter)
     ):
     md: MasterData = request.app.state.md
     item = await get_item(md, payload)
-    await translate_keys(item, session, language)
+    await translate_keys(item, language)
     return schemas.APIResponse[schemas.Item].create(request, item)
 
 @router.get(
@@ -36,13 +35,12 @@ async def item(
     response_model=schemas.APIResponse[list[schemas.Rune]]
 )
 async def rune(
-    session: SessionDep,
     request: Request,
     language: enums.Language = Depends(language_parameter)
     ):
     md: MasterData = request.app.state.md
     runes = await get_runes(md)
-    await translate_keys(runes, session, language)
+    await translate_keys(runes, language)
     return schemas.APIResponse[list[schemas.Rune]].create(request, runes)
 
 @router.get(
@@ -70,12 +68,11 @@ async def rune(
     response_model=schemas.APIResponse[list[schemas.Rune]]
 )
 async def rune_search(
-    session: SessionDep,
     request: Request,
     category: enums.RuneType,
     language: enums.Language = Depends(language_parameter)
     ):
     md: MasterData = request.app.state.md
     runes = await get_runes(md, category)
-    await translate_keys(runes, session, language)
+    await translate_keys(runes, language)
     return schemas.APIResponse[list[schemas.Rune]].create(request, runes)
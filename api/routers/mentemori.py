@@ -15,7 +15,7 @@ router = APIRouter()
 @router.get(
     routes.PLAYER_RANKING_PATH,
     summary='Player Rankings',
-    description='Returns player ranking data. Data is collected from mentemori.icu rankings.',
+    description='Returns player ranking data. Data is collected from mentemori.icu rankings. `timestamp` is when the player data last changed and `fetch_timestamp` is when its world was last fetched.',
     response_model=APIResponse[list[schemas.PlayerRankInfo]]
 )
 async def player_ranking(
@@ -45,7 +45,7 @@ async def player(
 @router.get(
     routes.GUILD_RANKING_PATH,
     summary='Guild Rankings',
-    description='Returns guild ranking data. Data is collected from mentemori.icu rankings.',
+    description='Returns guild ranking data. Data is collected from mentemori.icu rankings. `timestamp` is when the guild data last changed and `fetch_timestamp` is when its world was last fetched.',
     response_model=APIResponse[list[schemas.GuildRankInfo]]
 )
 async def guild_ranking(
@@ -4,7 +4,7 @@ from fastapi.responses import RedirectResponse
 from api.crud.string_keys import translate_keys
 from api.schemas.pve import get_quest, get_tower
 from api.schemas.requests import TowerRequest
-from api.utils.deps import SessionDep, language_parameter
+from api.utils.deps import language_parameter
 from api.utils.masterdata import MasterData
 from common import routes, schemas
 from common.enums import Language
@@ -21,14 +21,13 @@ router = APIRouter()
     response_model=schemas.APIResponse[schemas.Quest]
 )
 async def quest(
-    session: SessionDep,
     request: Request,
     quest_id: int,
     language: Language = Depends(language_parameter)
 ):
     md: MasterData = request.app.state.md
     quest = await get_quest(md, quest_id)
-    await translate_keys(quest, session, language)
+    await translate_keys(quest, language)
     return schemas.APIResponse[schemas.Quest].create(request, quest)
 
 @router.get(
@@ -38,14 +37,13 @@ async def quest(
     response_model=schemas.APIResponse[schemas.Tower]
 )
 async def tower(
-    session: SessionDep,
     request: Request,
     payload: TowerRequest = Depends(),
     language: Language = Depends(language_parameter)
 ):
     md: MasterData = request.app.state.md
     tower = await get_tower(md, payload)
-    await translate_keys(tower, session, language)
+    await translate_keys(tower, language)
     return schemas.APIResponse[schemas.Tower].create(request, tower)
 
 # Redirects for old routes
@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Request, Depends
 
 from api.crud.string_keys import translate_keys
 from api.schemas.skills import get_skill_id
-from api.utils.deps import SessionDep, language_parameter
+from api.utils.deps import language_parameter
 from api.utils.masterdata import MasterData
 from common import routes, schemas
 from common.enums import Language
@@ -19,12 +19,11 @@ router = APIRouter()
     response_model=schemas.APIResponse[schemas.ActiveSkill|schemas.PassiveSkill]
 )
 async def skill(
-    session: SessionDep,
     request: Request,
     skill_id: int,
     language: Language = Depends(language_parameter)
     ):
     md: MasterData = request.app.state.md
     skill = await get_skill_id(md, skill_id)
-    await translate_keys(skill, session, language)
+    await translate_keys(skill, language)
     return schemas.APIResponse[schemas.ActiveSkill|schemas.PassiveSkill].create(request, skill)
\ No newline at end of file
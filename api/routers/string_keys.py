@@ -50,8 +50,8 @@ async def string_name(session: SessionDep, request: Request, char_id: int, langu
     description='Directly gets unique weapon skill description strings for a given character without referencing the actual equipment.',
     response_model=schemas.APIResponse[schemas.UWDescriptions]
 )
-async def string_uw_descriptions(session: SessionDep, request: Request, char_id: int, language=Depends(language_parameter)):
-    uw_descriptions = await get_uw_desc_strings(session, char_id, language)
+async def string_uw_descriptions(request: Request, char_id: int, language=Depends(language_parameter)):
+    uw_descriptions = await get_uw_desc_strings(char_id, language)
     if not uw_descriptions:
         raise APIError(f'UW descriptions for character {char_id} in language {language} does not exist.')
     return schemas.APIResponse[schemas.UWDescriptions].create(request, uw_descriptions)
@@ -62,7 +62,7 @@ async def string_uw_descriptions(session: SessionDep, request: Request, char_id:
     description='Returns a list of common enum strings.',
     response_model=schemas.APIResponse[schemas.CommonStrings]
 )
-async def string_common(session: SessionDep, request: Request, language=Depends(language_parameter)):
+async def string_common(request: Request, language=Depends(language_parameter)):
     common_strings = schemas.CommonStrings()
-    await translate_keys(common_strings, session, language)
+    await translate_keys(common_strings, language)
     return schemas.APIResponse[schemas.CommonStrings].create(request, common_strings)
@@ -1,10 +1,15 @@
+from itertools import product
 from typing import Literal
 
+import numpy as np
+
 from api.utils.error import APIError
-from api.utils.masterdata import MasterData
+from api.utils.masterdata import MasterData, cache_derived, cache_model
 from api.schemas.equipment import search_uw_info
+from api.schemas.requests import BaseStatRequest
 from common import schemas, enums
 
+@cache_model
 async def get_character(md: MasterData, id: int):
     char_data = await md.search_id(id, 'CharacterMB')
     uw_data = await search_uw_info(md, id)
@@ -56,37 +61,73 @@ async def get_arcana_levels(md: MasterData) -> dict[int, list[dict]]:
         levels[arcana_id].append(level)
     return levels
 
-def check_parameter(
-    parameter: schemas.Parameter,
-    category: enums.ParameterCategory|None,
-    parameter_type: int|None,
-    change_type: enums.ParameterChangeType|None
-) -> bool:
-    if category is not None and category != parameter.category:
-        return False
-    if parameter_type is not None and parameter_type != parameter.type:
-        return False
-    if change_type is not None and change_type != parameter.change_type:
-        return False
-    return True
+class ArcanaStore:
+    '''
+    All arcana of a master version with inverted indexes of their positions.
+    Parameter keys are (category, type, change_type) of the max level parameters with None as wildcard.
+    Arcana without levels match every parameter and level bonus filter.
+    '''
+    def __init__(self, arcanas: list[schemas.Arcana]):
+        self.arcanas = arcanas
+        self.by_char: dict[int, list[int]] = {}
+        self.by_parameter: dict[tuple, list[int]] = {}
+        self.by_level_bonus: dict[bool, list[int]] = {True: [], False: []}
+        self.unleveled: list[int] = []
 
-async def get_arcana(
-    md: MasterData,
-    character: int|None=None,
-    parameter_category: enums.ParameterCategory|None=None,
-    parameter_type: int|None=None,
-    parameter_change_type: enums.ParameterChangeType|None=None,
-    has_level_bonus: bool|None=None
-) -> list[schemas.Arcana]:
+        for i, arcana in enumerate(arcanas):
+            for char_id in dict.fromkeys(arcana.characters):
+                self.by_char.setdefault(char_id, []).append(i)
+
+            if not arcana.levels:
+                self.unleveled.append(i)
+                self.by_level_bonus[True].append(i)
+                self.by_level_bonus[False].append(i)
+                continue
+            max_level = arcana.levels[-1]
+            self.by_level_bonus[max_level.level_bonus > 0].append(i)
+            keys = {
+                key
+                for param in max_level.parameters
+                for key in product((param.category, None), (param.type, None), (param.change_type, None))
+            }
+            for key in keys:
+                self.by_parameter.setdefault(key, []).append(i)
+
+    def search(
+        self,
+        character: int|None=None,
+        parameter_category: enums.ParameterCategory|None=None,
+        parameter_type: int|None=None,
+        parameter_change_type: enums.ParameterChangeType|None=None,
+        has_level_bonus: bool|None=None
+    ) -> list[schemas.Arcana]:
+        '''Returns cached models in MB order. Copy before modifying.'''
+        matches: list[list[int]] = []
+        if character:
+            matches.append(self.by_char.get(character, []))
+        if parameter_category is not None or parameter_type is not None or parameter_change_type is not None:
+            key = (parameter_category, parameter_type, parameter_change_type)
+            matches.append(sorted(self.by_parameter.get(key, []) + self.unleveled))
+        if has_level_bonus is not None:
+            matches.append(self.by_level_bonus[has_level_bonus])
+
+        if not matches:
+            return list(self.arcanas)
+        matches.sort(key=len)
+        positions = matches[0]
+        if len(matches) > 1:
+            others = [set(match) for match in matches[1:]]
+            positions = [i for i in positions if all(i in other for other in others)]
+        return [self.arcanas[i] for i in positions]
+
+@cache_derived
+async def get_arcana_store(md: MasterData) -> ArcanaStore:
     arcanas = []
     arcana_data = await md.get_MB('CharacterCollectionMB')
     level_data = await get_arcana_levels(md)
     reward_data = await get_arcana_rewards(md)
 
-    for arcana in arcana_data:  # reverse filter. Continues if any of the conditions are met.
-        if character and character not in arcana['RequiredCharacterIds']:
-            continue
-
+    for arcana in arcana_data:
         levels: list[schemas.ArcanaLevel] = []
         char_count = len(arcana['RequiredCharacterIds'])
         for level in level_data.get(arcana['Id'], []):
@@ -94,19 +135,21 @@ async def get_arcana(
                 **level,
                 reward=reward_data.get((level['CollectionLevel'], char_count), [])
             ))
-
-        if levels:
-            if parameter_category is not None or parameter_type is not None or parameter_change_type is not None:
-                if not any(check_parameter(param, parameter_category, parameter_type, parameter_change_type) for param in levels[-1].parameters):
-                    continue
-
-            if has_level_bonus is not None:
-                if (levels[-1].level_bonus > 0) != has_level_bonus:  # Left True => has level bonus. If left != has_level_bonus fails check.
-                    continue
-
-
         arcanas.append(schemas.Arcana(**arcana, levels=levels))
-    return arcanas
+    return ArcanaStore(arcanas)
+
+async def get_arcana(
+    md: MasterData,
+    character: int|None=None,
+    parameter_category: enums.ParameterCategory|None=None,
+    parameter_type: int|None=None,
+    parameter_change_type: enums.ParameterChangeType|None=None,
+    has_level_bonus: bool|None=None
+) -> list[schemas.Arcana]:
+    '''Returns copies which can be translated'''
+    store = await get_arcana_store(md)
+    arcanas = store.search(character, parameter_category, parameter_type, parameter_change_type, has_level_bonus)
+    return [arcana.model_copy(deep=True) for arcana in arcanas]
 
 async def get_potential(
     md: MasterData,
@@ -128,3 +171,98 @@ async def get_potential(
         coefficients=coefficients
     )
 
+
+class StatTable:
+    '''
+    CharacterPotentialMB curve and character coefficients as arrays for vectorized base stats.
+    Stat = int((total * m + b) * coefficient / gross), evaluated in this order for float parity.
+    '''
+    def __init__(self, potential: schemas.CharacterPotential, characters: list[dict]):
+        self.levels = sorted(potential.levels, key=lambda level: tuple(map(int, level.split('.'))))
+        self.level_index = {level: i for i, level in enumerate(self.levels)}
+        self.totals = np.array([potential.levels[level] for level in self.levels], dtype=np.float64)
+
+        self.char_ids = [character['Id'] for character in characters]
+        self.char_index = {char_id: i for i, char_id in enumerate(self.char_ids)}
+        self.speed = [character['InitialBattleParameter']['Speed'] for character in characters]
+        self.coefficients = np.array([
+            [coeffs['Muscle'], coeffs['Energy'], coeffs['Intelligence'], coeffs['Health']]
+            for coeffs in (character['BaseParameterCoefficient'] for character in characters)
+        ], dtype=np.float64).reshape(-1, 4)
+        self.gross = np.array([character['BaseParameterGrossCoefficient'] for character in characters], dtype=np.float64)
+
+        # rarity -> m and b per character, nan if the rarity is not reachable from the initial rarity
+        base_rarities = [character['RarityFlags'] for character in characters]
+        rarities = {rarity for rarity_coefficients in potential.coefficients.values() for rarity in rarity_coefficients}
+        self.m: dict[enums.CharacterRarity, np.ndarray] = {}
+        self.b: dict[enums.CharacterRarity, np.ndarray] = {}
+        for rarity in rarities:
+            infos = [potential.coefficients.get(base_rarity, {}).get(rarity) for base_rarity in base_rarities]
+            self.m[rarity] = np.array([info.m if info else np.nan for info in infos], dtype=np.float64)
+            self.b[rarity] = np.array([info.b if info else np.nan for info in infos], dtype=np.float64)
+
+    def compute(
+        self,
+        rarity: enums.CharacterRarity,
+        start: str,
+        end: str,
+        char_ids: list[int]|None = None,
+        max_stats: int|None = None
+    ) -> schemas.BaseStatTable:
+        '''max_stats limits levels * characters, counting every character if char_ids is None'''
+        if start not in self.level_index or end not in self.level_index:
+            raise APIError(f'No data for level {start if start not in self.level_index else end}.')
+        start_i, end_i = self.level_index[start], self.level_index[end]
+        if start_i > end_i:
+            raise APIError('Start level should be equal or lower than end level.')
+        if rarity not in self.m:
+            raise APIError(f'No coefficients for rarity {rarity.name}')
+        level_count = end_i - start_i + 1
+        char_count = len(self.char_ids) if char_ids is None else len(char_ids)
+        if max_stats is not None and level_count * char_count > max_stats:
+            raise APIError(
+                f'Too many stats requested ({level_count} levels * {char_count} characters). '
+                f'Limit is {max_stats}, narrow the level range or the characters.'
+            )
+
+        if char_ids is None:
+            positions = np.arange(len(self.char_ids))
+        else:
+            if missing := [char_id for char_id in char_ids if char_id not in self.char_index]:
+                raise APIError(f'Could not find character info with id {', '.join(map(str, missing))}')
+            positions = np.array([self.char_index[char_id] for char_id in char_ids], dtype=np.intp)
+        m = self.m[rarity][positions]
+        positions = positions[~np.isnan(m)]  # skip characters that can't reach rarity
+        m = m[~np.isnan(m)]
+        b = self.b[rarity][positions]
+
+        totals = self.totals[start_i:end_i + 1]
+        scaled = totals[np.newaxis, :] * m[:, np.newaxis] + b[:, np.newaxis]  # (characters, levels)
+        stats = scaled[:, np.newaxis, :] * self.coefficients[positions][:, :, np.newaxis] / self.gross[positions][:, np.newaxis, np.newaxis]
+        stats = np.trunc(stats).astype(np.int64).tolist()  # (characters, [str, dex, mag, sta], levels)
+
+        return schemas.BaseStatTable(
+            rarity=rarity,
+            levels=self.levels[start_i:end_i + 1],
+            characters=[
+                schemas.CharacterBaseStats(
+                    char_id=self.char_ids[position],
+                    speed=self.speed[position],
+                    str=char_stats[0],
+                    dex=char_stats[1],
+                    mag=char_stats[2],
+                    sta=char_stats[3]
+                )
+                for position, char_stats in zip(positions.tolist(), stats)
+            ]
+        )
+
+@cache_derived
+async def get_stat_table(md: MasterData) -> StatTable:
+    potential = await get_potential(md)
+    characters = list(await md.get_MB('CharacterMB'))
+    return StatTable(potential, characters)
+
+async def get_base_stats(md: MasterData, payload: BaseStatRequest) -> schemas.BaseStatTable:
+    stat_table = await get_stat_table(md)
+    return stat_table.compute(payload.rarity, payload.start, payload.end, payload.char_id, payload.MAX_STATS)
@@ -0,0 +1,153 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+
+import numpy as np
+
+from api.utils.error import APIError
+from api.utils.masterdata import MasterData, cache_derived
+from common import schemas
+
+class CostTable:
+    '''
+    Cumulative item costs of consecutive steps, steps[i] being the items spent on step i.
+    cost(start, end) totals steps start to end-1 with a single row subtraction.
+    '''
+    def __init__(self, steps: list[list[Mapping]]):
+        columns: dict[tuple[int, int], int] = {}  # (ItemType, ItemId) -> column, in order of appearance
+        for items in steps:
+            for item in items:
+                columns.setdefault((item['ItemType'], item['ItemId']), len(columns))
+
+        counts = np.zeros((len(steps) + 1, len(columns)), dtype=np.int64)
+        for i, items in enumerate(steps, 1):
+            for item in items:
+                counts[i, columns[(item['ItemType'], item['ItemId'])]] += item['ItemCount']
+        self.items = list(columns)
+        self.prefix = np.cumsum(counts, axis=0)
+
+    def __len__(self) -> int:
+        return len(self.prefix) - 1
+
+    def cost(self, start: int, end: int) -> list[dict]:
+        '''Items with a non zero total in MB format'''
+        totals = (self.prefix[end] - self.prefix[start]).tolist()
+        return [
+            {'ItemId': item_id, 'ItemType': item_type, 'ItemCount': count}
+            for (item_type, item_id), count in zip(self.items, totals) if count
+        ]
+
+class ReinforcementTable:
+    '''Equipment upgrade levels of weapons or other slots with their coefficients and cumulative costs'''
+    def __init__(self, param_data: list[Mapping], cost_data: list[Mapping], is_weapon: bool):
+        upgrade_key = 'WeaponRequiredItemList' if is_weapon else 'OthersRequiredItemList'
+        self.is_weapon = is_weapon
+        self.levels: list[int] = []
+        self.upgrades: list[schemas.EquipmentUpgradeLevel] = []
+        steps = []
+        for param, cost in zip(param_data, cost_data):
+            self.levels.append(cost['ReinforcementLevel'])
+            self.upgrades.append(schemas.EquipmentUpgradeLevel(
+                upgrade_level=cost['ReinforcementLevel'],
+                coefficient=param['ReinforcementCoefficient'],  # floored
+                cost=cost[upgrade_key]
+            ))
+            steps.append(cost[upgrade_key])
+        self.costs = CostTable(steps)
+
+    def span(self, start: int=0, target: int|None=None) -> tuple[int, int]:
+        '''Positions of upgrade levels from start to target, both included'''
+        end = len(self.levels) if target is None else bisect_right(self.levels, target)
+        return bisect_left(self.levels, start), end
+
+    def upgrades_between(self, start: int=0, target: int|None=None) -> list[schemas.EquipmentUpgradeLevel]:
+        '''Cached models, do not modify'''
+        i, j = self.span(start, target)
+        return self.upgrades[i:j]
+
+    def cost(self, start: int=0, target: int|None=None) -> list[dict]:
+        i, j = self.span(start, target)
+        return self.costs.cost(i, max(i, j))
+
+@cache_derived
+async def get_reinforcement_table(md: MasterData, is_weapon: bool) -> ReinforcementTable:
+    param_data = await md.get_MB('EquipmentReinforcementParameterMB')
+    cost_data = await md.get_MB('EquipmentReinforcementMaterialMB')
+    return ReinforcementTable(param_data, cost_data, is_weapon)
+
+class EvolutionTable:
+    '''Equipment level enhancements of one EquipmentEvolutionMB row, by the level they start from'''
+    def __init__(self, evolution_info: list[Mapping]):
+        self.levels: list[int] = [info['BeforeEquipmentLv'] for info in evolution_info]
+        self.costs = CostTable([info['RequiredItemList'] for info in evolution_info])
+
+    def cost(self, start: int, target: int) -> list[dict]:
+        '''Enhancements from equipment level start until target is reached'''
+        i, j = bisect_left(self.levels, start), bisect_left(self.levels, target)
+        return self.costs.cost(i, max(i, j))
+
+@cache_derived
+async def get_evolution_table(md: MasterData, evolution_id: int) -> EvolutionTable:
+    evolution = await md.search_id(evolution_id, 'EquipmentEvolutionMB')
+    return EvolutionTable(evolution['EquipmentEvolutionInfoList'] if evolution else [])
+
+def merge_costs(*costs: list[Mapping]) -> list[dict]:
+    '''Sums item lists in MB format, keeping the order items first appear in'''
+    totals: dict[tuple[int, int], int] = {}
+    for items in costs:
+        for item in items:
+            key = (item['ItemType'], item['ItemId'])
+            totals[key] = totals.get(key, 0) + item['ItemCount']
+    return [
+        {'ItemId': item_id, 'ItemType': item_type, 'ItemCount': count}
+        for (item_type, item_id), count in totals.items() if count
+    ]
+
+def parse_level(level: str) -> tuple[int, int]:
+    '''"241.3" -> (241, 3), "241" -> (241, 0)'''
+    base, _, sub = level.partition('.')
+    try:
+        return int(base), int(sub or 0)
+    except ValueError:
+        raise APIError(f'Level {level} is not valid. Example valid inputs. 240, 240.0, 240.1...')
+
+class LevelLinkTable:
+    '''LevelLinkMB as cumulative costs. Row i is the cost to level up from its (PartyLevel, PartySubLevel).'''
+    def __init__(self, link_data: list[Mapping]):
+        self.levels = [(link['PartyLevel'], link['PartySubLevel']) for link in link_data]
+        self.index = {level: i for i, level in enumerate(self.levels)}
+        self.max_level = self.levels[-1][0] if self.levels else 0
+        self.costs = CostTable([link['RequiredLevelUpItems'] for link in link_data])
+
+    def position(self, level: tuple[int, int], is_end: bool=False) -> int:
+        if is_end and level[0] == self.max_level + 1:  # fully linked
+            return len(self.levels)
+        if level not in self.index:
+            raise APIError(f'No level link data for {level[0]}.{level[1]}. Max level is {self.max_level}.9')
+        return self.index[level]
+
+    def cost(self, start: tuple[int, int], end: tuple[int, int]) -> list[dict]:
+        i, j = self.position(start), self.position(end, is_end=True)
+        if i > j:
+            raise APIError('Start level should be equal or lower than end level.')
+        return self.costs.cost(i, j)
+
+@cache_derived
+async def get_level_link_table(md: MasterData) -> LevelLinkTable:
+    return LevelLinkTable(await md.get_MB('LevelLinkMB'))
+
+async def get_level_link_cost(md: MasterData, start: str, end: str|None=None) -> schemas.LevelLinkCost:
+    table = await get_level_link_table(md)
+    start_level = parse_level(start)
+    if end is None:
+        end_level = ((start_level[0] + 10) // 10 * 10, 0)  # next multiple of 10
+    else:
+        end_level = parse_level(end)
+    if end_level[0] == table.max_level + 1:
+        end_level = (end_level[0], 0)
+
+    return schemas.LevelLinkCost(
+        start=f'{start_level[0]}.{start_level[1]}',
+        end=f'{end_level[0]}.{end_level[1]}',
+        max_level=table.max_level,
+        cost=table.cost(start_level, end_level)
+    )
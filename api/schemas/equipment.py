@@ -1,11 +1,39 @@
 from api.schemas import requests
+from api.schemas.costs import get_evolution_table, get_reinforcement_table, merge_costs
 from api.utils.error import APIError
-from api.utils.masterdata import MasterData
+from api.utils.masterdata import MasterData, cache_derived, cache_model
 from common import enums, schemas
 
 from api.utils.logger import get_logger
 logger = get_logger(__name__)
 
+class UniqueWeaponInfo:
+    '''UW rows of a character. equipment is keyed by (RarityFlags, EquipmentLv).'''
+    __slots__ = ('composite_id', 'equipment', 'description')
+
+    def __init__(self, composite_id: int):
+        self.composite_id = composite_id
+        self.equipment: dict[tuple[int, int], dict] = {}
+        self.description: dict|None = None  # EquipmentExclusiveSkillDescriptionMB
+
+@cache_derived
+async def get_uw_map(md: MasterData) -> dict[int, UniqueWeaponInfo]:
+    '''Character id -> UW rows, for characters with a UW composite id'''
+    uw_map: dict[int, UniqueWeaponInfo] = {}
+    uws: dict[int, UniqueWeaponInfo] = {}  # by composite id
+    for profile in await md.get_MB('CharacterProfileMB'):
+        if composite_id := profile.get('EquipmentCompositeId', 0):
+            uw_map[profile['Id']] = uws.setdefault(composite_id, UniqueWeaponInfo(composite_id))
+
+    for equipment in await md.get_MB('EquipmentMB'):
+        if (uw := uws.get(equipment['CompositeId'])) is not None:
+            uw.equipment.setdefault((equipment['RarityFlags'], equipment['EquipmentLv']), equipment)
+
+    for uw in uws.values():
+        if ssr := uw.equipment.get((128, 180)):  # description is shared by all rarities
+            if desc_id := ssr.get('EquipmentExclusiveSkillDescriptionId'):
+                uw.description = await md.search_id(desc_id, 'EquipmentExclusiveSkillDescriptionMB')
+    return uw_map
 
 async def search_equipment(md: MasterData, *, rarity, level, slot=None, job=None, character=None, quality=None)->tuple[dict, dict]:
     '''
@@ -18,12 +46,11 @@ async def search_equipment(md: MasterData, *, rarity, level, slot=None, job=None
         'EquipmentLv': level,
     }
     if character:
-        # TODO add error checks
-        profile_data = await md.search_id(character, 'CharacterProfileMB')
-        if profile_data:
-            search_args['CompositeId'] = profile_data.get('EquipmentCompositeId', 0)
-        else:
+        uw = (await get_uw_map(md)).get(character)
+        if uw is None:
             return None, search_args
+        search_args['CompositeId'] = uw.composite_id
+        return uw.equipment.get((search_args['RarityFlags'], level)), search_args
     else:
         if quality:
             search_args['QualityLv'] = quality
@@ -38,42 +65,25 @@ async def search_equipment(md: MasterData, *, rarity, level, slot=None, job=None
 
 async def search_uw_info(md: MasterData, character: int):
     '''Only use when general UW data is needed'''
-    uw_info, _ = await search_equipment(md, rarity=128, level=180, character=character)  # rarity and level simply set to SSR UW
-    return uw_info
+    uw = (await get_uw_map(md)).get(character)
+    return uw.equipment.get((128, 180)) if uw else None  # rarity and level simply set to SSR UW
 
 async def parse_equipment_upgrades(md: MasterData, is_weapon: bool, start: int=0, target: int|None=None) -> schemas.EquipmentUpgradeData:
     if target and target < start:
         raise APIError(f'Equipment upgrade target level({target}) cannot be lower than start level({start})')
-    param_data = await md.get_MB('EquipmentReinforcementParameterMB')
-    cost_data = await md.get_MB('EquipmentReinforcementMaterialMB')
-    upgrade_key = 'WeaponRequiredItemList' if is_weapon else 'OthersRequiredItemList'
-
-    upgrades = []
-    for param, cost in zip(param_data, cost_data):
-        level = cost.get('ReinforcementLevel')
-        if level < start:  # starts when level == start
-            continue
-        if target is not None and level > target: # include level == end
-            break
-        upgrades.append(
-            {
-                'upgrade_level': level,
-                'coefficient': param['ReinforcementCoefficient'], # floored
-                'cost': cost[upgrade_key]
-            }
-        )
-
-    upgrade_data = schemas.EquipmentUpgradeData(is_weapon=is_weapon, upgrades=upgrades)
-    return upgrade_data
+    table = await get_reinforcement_table(md, is_weapon)
+    return schemas.EquipmentUpgradeData(
+        is_weapon=is_weapon,
+        upgrades=table.upgrades_between(start, target),
+        total_cost=table.cost(start, target)
+    )
 
-async def parse_equipment_enhancement(md: MasterData, equipment: schemas.Equipment) -> tuple[schemas.EquipmentEnhanceLevel, schemas.EquipmentEnhanceRarity]:
+def parse_rarity_enhancement(equipment: schemas.Equipment) -> list[schemas.EquipmentEnhanceRarity]:
     '''
-    Gets enhancement data for current equipment
+    Rarity upgrades leading to the equipment rarity
+    EvolutionType: 1 in EquipmentEvolution data
     '''
-    level_info = []
     rarity_info = []
-    
-    # EvolutionType: 1 in EquipmentEvolution data
     # SSR→UR
     if isinstance(equipment, schemas.UniqueWeapon):
         if equipment.rarity >= enums.ItemRarity.UR:
@@ -93,6 +103,14 @@ async def parse_equipment_enhancement(md: MasterData, equipment: schemas.Equipme
                     cost=[{"ItemCount": 50, "ItemId": 1, "ItemType": 24}]
                 )
             )
+    return rarity_info
+
+async def parse_equipment_enhancement(md: MasterData, equipment: schemas.Equipment) -> tuple[schemas.EquipmentEnhanceLevel, schemas.EquipmentEnhanceRarity]:
+    '''
+    Gets enhancement data for current equipment
+    '''
+    level_info = []
+    rarity_info = parse_rarity_enhancement(equipment)
     
     enhance_data = await md.search_id(equipment.evolution_id, 'EquipmentEvolutionMB')
     if enhance_data:
@@ -164,9 +182,14 @@ async def get_equipment(md: MasterData, payload: int|requests.EquipmentRequest|r
         eq_data = await md.search_id(payload, 'EquipmentMB')
     if not eq_data:
         raise APIError(f'Could not find equipment matching request<br>Request:{str(payload.model_dump())}<br>Search Args:{args}')
-    eq = await parse_equipment(md, eq_data)
+    return await build_equipment(md, eq_data['Id'])
 
-    return eq
+@cache_model
+async def build_equipment(md: MasterData, equip_id: int) -> schemas.Equipment|schemas.UniqueWeapon:
+    eq_data = await md.search_id(equip_id, 'EquipmentMB')
+    if eq_data is None:
+        raise APIError(f'Could not find equipment {equip_id}')
+    return await parse_equipment(md, eq_data)
 
 async def get_upgrade_costs(md: MasterData, payload: requests.EquipmentCostRequest) -> schemas.EquipmentCosts:
     eq_data = await get_equipment(md, payload.equip_id)
@@ -185,3 +208,57 @@ async def get_upgrade_costs(md: MasterData, payload: requests.EquipmentCostReque
         enhance_costs=enhance_costs,
         rarity_enhance_costs=rarity_costs
     )
+
+def mb_items(items: list[schemas.ItemCount]) -> list[dict]:
+    return [{'ItemId': item.item_id, 'ItemType': item.item_type, 'ItemCount': item.count} for item in items]
+
+async def plan_equipment_cost(md: MasterData, piece: requests.EquipmentPlanPiece) -> schemas.EquipmentPlanCost:
+    '''Cost of bringing owned equipment (or nothing) to the target equipment and upgrade level'''
+    eq_data = await build_equipment(md, piece.equip_id)
+    if eq_data.level < piece.to_upgrade:
+        raise APIError(f'Upgrade level cannot be higher than equipment level. Equipment {piece.equip_id}')
+    if eq_data.level < piece.from_level:
+        raise APIError(f'Starting level({piece.from_level}) cannot be higher than equipment level({eq_data.level}). Equipment {piece.equip_id}')
+
+    synthesis_cost = []
+    current_rarity = piece.from_rarity
+    if current_rarity is None:
+        synthesis = await parse_equipment_synthesis(md, eq_data)
+        if synthesis is None:
+            raise APIError(f'Equipment {piece.equip_id} cannot be synthesized. Provide the starting rarity.')
+        synthesis_cost = mb_items(synthesis.cost)
+        current_rarity = synthesis.rarity
+
+    rarity_costs = []
+    for rarity in parse_rarity_enhancement(eq_data):
+        if rarity.before_rarity == current_rarity:
+            current_rarity = rarity.after_rarity
+            rarity_costs.append(mb_items(rarity.cost))
+    if current_rarity != eq_data.rarity:
+        raise APIError(f'Starting {enums.ItemRarity(current_rarity).name} rarity cannot be upgraded to {enums.ItemRarity(eq_data.rarity).name}. Equipment {piece.equip_id}')
+
+    evolution_table = await get_evolution_table(md, eq_data.evolution_id)
+    enhance_cost = merge_costs(*rarity_costs, evolution_table.cost(piece.from_level, eq_data.level))
+
+    reinforcement_table = await get_reinforcement_table(md, eq_data.slot == 1)
+    upgrade_cost = reinforcement_table.cost(piece.from_upgrade + 1, piece.to_upgrade)  # from_upgrade is already reached
+
+    return schemas.EquipmentPlanCost(
+        equip_id=piece.equip_id,
+        rarity=eq_data.rarity,
+        level=eq_data.level,
+        upgrade=piece.to_upgrade,
+        synthesis_cost=synthesis_cost,
+        enhance_cost=enhance_cost,
+        upgrade_cost=upgrade_cost,
+        total_cost=merge_costs(synthesis_cost, enhance_cost, upgrade_cost)
+    )
+
+async def get_equipment_plan(md: MasterData, payload: requests.EquipmentPlanRequest) -> schemas.EquipmentPlan:
+    pieces = []
+    totals = []
+    for piece in payload.pieces:
+        plan = await plan_equipment_cost(md, piece)
+        pieces.append(plan)
+        totals.append(mb_items(plan.total_cost))
+    return schemas.EquipmentPlan(pieces=pieces, total_cost=merge_costs(*totals))
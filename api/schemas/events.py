@@ -1,47 +1,79 @@
-from api.utils.masterdata import MasterData
+from api.utils.masterdata import MasterData, cache_derived
 from common import schemas
 from common.enums import GachaType, Server
-from common.timezones import check_active
+from common.timezones import convert_from_local, get_current
 
 from api.utils.logger import get_logger
 logger = get_logger(__name__)
 
+type Banner = schemas.GachaPickup|schemas.GachaChosenGroup
+CATEGORIES = ('fleeting', 'ioc', 'iosg', 'chosen', 'eminence')
+
 class RunCounter:
     def __init__(self):
-        self.run_counts: dict[int, list] = {}
+        self.run_counts: dict[int, dict[str, int]] = {}  # char_id -> {run: run count}
 
     def get_run_count(self, char_id: int, run: str) -> int:
-        if char_id not in self.run_counts:
-            self.run_counts[char_id] = []  # initialize char counter
-        if run not in self.run_counts[char_id]:  # check if run exists
-            self.run_counts[char_id].append(run)  # TODO: sort by date for futureproofing?
-        return self.run_counts[char_id].index(run) + 1
+        runs = self.run_counts.setdefault(char_id, {})  # TODO: sort by date for futureproofing?
+        return runs.setdefault(run, len(runs) + 1)
     
 def parse_run(start, end) -> str: # tuple[str, str]:
     '''Remove hour and second data for run counting'''
     return start[:10]#, end[:10]  # start from start date only
 
-def filter_append_gacha(
-    gacha_list: list,
-    gacha: schemas.GachaPickup|schemas.GachaChosenGroup,
-    char_id: int|None=None,
-    is_active=True,
-    include_future=False) -> None:
-    if char_id:
+class GachaTimeline:
+    '''
+    Every pickup banner of a master version with its active period as timestamps.
+    Banners are kept in parse order per category and indexed by character.
+    '''
+    def __init__(self):
+        self.banners: dict[str, list[tuple[Banner, int, int]]] = {category: [] for category in CATEGORIES}
+        self.by_char: dict[int, dict[str, list[tuple[Banner, int, int]]]] = {}
+
+    def add(self, category: str, gacha: Banner) -> None:
+        entry = (
+            gacha,
+            convert_from_local(gacha.start, Server.Japan),
+            convert_from_local(gacha.end, Server.Japan)
+        )
+        self.banners[category].append(entry)
         if isinstance(gacha, schemas.GachaPickup):
-            if gacha.char_id != char_id:
-                return
+            char_ids = [gacha.char_id]
         else:  # chosen or eminence group
-            if not any(char_id == banner.char_id for banner in gacha.banners):
-                return
-        
-    if is_active:
-        if not check_active(gacha.start, gacha.end, Server.Japan, include_future=include_future):
-            return
-    
-    gacha_list.append(gacha)
-        
-async def get_gacha(md: MasterData, char_id: int|None=None, is_active=True, include_future=False) -> schemas.GachaPickupBanners:
+            char_ids = dict.fromkeys(banner.char_id for banner in gacha.banners)
+        for char_id in char_ids:
+            char_banners = self.by_char.setdefault(char_id, {category: [] for category in CATEGORIES})
+            char_banners[category].append(entry)
+
+    def filter(self, char_id: int|None=None, is_active=True, include_future=False) -> schemas.GachaPickupBanners:
+        if char_id:
+            banners = self.by_char.get(char_id, {category: [] for category in CATEGORIES})
+        else:
+            banners = self.banners
+
+        current = get_current()
+        def is_shown(start: int, end: int) -> bool:
+            if not is_active:
+                return True
+            if include_future:
+                return current <= end
+            return start <= current <= end
+
+        return schemas.GachaPickupBanners(**{
+            category: [gacha for gacha, start, end in entries if is_shown(start, end)]
+            for category, entries in banners.items()
+        })
+
+def match_select_lists(select_lists: list[dict], banner: dict) -> dict|None:
+    '''Pops the first unused select list starting on the same day as banner. There is no link between gachacase and select list.'''
+    run = parse_run(banner['StartTimeFixJST'], banner['EndTimeFixJST'])
+    for i, banner_data in enumerate(select_lists):
+        if run == parse_run(banner_data['StartTimeFixJST'], banner_data['EndTimeFixJST']):
+            return select_lists.pop(i)
+    return None
+
+@cache_derived
+async def get_gacha_timeline(md: MasterData) -> GachaTimeline:
     gachacase_data = await md.get_MB('GachaCaseMB')
     gachacaseui_data = await md.get_MB('GachaCaseUiMB')
     gachadestiny_data = await md.get_MB('GachaDestinyAddCharacterMB')
@@ -49,21 +81,16 @@ async def get_gacha(md: MasterData, char_id: int|None=None, is_active=True, incl
     
     gachacaseui_lookup = {item['Id']: item for item in gachacaseui_data}
     gachaselect_lookup = {}
-    chosen_ids = set()
-    eminence_ids = set()
+    chosen_lists = []
+    eminence_lists = []
     for item in gachaselect_data:
-        _id = item['Id']
-        gachaselect_lookup[_id] = item
+        gachaselect_lookup[item['Id']] = item
         if item['GachaSelectListType'] == GachaType.Chosen:
-            chosen_ids.add(_id)
+            chosen_lists.append(item)
         elif item['GachaSelectListType'] == GachaType.Eminence:
-            eminence_ids.add(_id)
-    fleeting_list = []
-    ioc_list = []
-    iosg_list = []
-    chosen_list = []
-    eminence_list = []
-    
+            eminence_lists.append(item)
+
+    timeline = GachaTimeline()
     run_counter = RunCounter()
     eminence_data = []  # defer parsing until IoSG has been parsed for correct run counts
 
@@ -81,21 +108,14 @@ async def get_gacha(md: MasterData, char_id: int|None=None, is_active=True, incl
                     char_id=char,
                     run_count=run_count
                 )
-                filter_append_gacha(fleeting_list, gacha, char_id, is_active, include_future)
+                timeline.add('fleeting', gacha)
             # Chosen fleeting banner
             elif banner['GachaSelectListType'] == GachaType.Chosen:  # 4
-                banner_data = None
-                run = parse_run(banner['StartTimeFixJST'], banner['EndTimeFixJST'])
-                for _id in chosen_ids:  # No link between gachacase and select list
-                    banner_data = gachaselect_lookup[_id]
-                    banner_run = parse_run(banner_data['StartTimeFixJST'], banner_data['EndTimeFixJST'])
-                    if run == banner_run:
-                        chosen_ids.remove(_id)
-                        break
-
+                banner_data = match_select_lists(chosen_lists, banner)
                 if not banner_data:
                     continue
                 
+                run = parse_run(banner['StartTimeFixJST'], banner['EndTimeFixJST'])
                 gacha_list = []
                 for character in banner_data['CharacterIdList']:
                     char = int(character)
@@ -114,7 +134,7 @@ async def get_gacha(md: MasterData, char_id: int|None=None, is_active=True, incl
                     select_list_id=banner_data['Id'],
                     banners=gacha_list
                 )
-                filter_append_gacha(chosen_list, chosen_group, char_id, is_active, include_future)
+                timeline.add('chosen', chosen_group)
                 
             # Chosen Eminence banner
             elif banner['GachaSelectListType'] == GachaType.Eminence:
@@ -135,7 +155,7 @@ async def get_gacha(md: MasterData, char_id: int|None=None, is_active=True, incl
             char_id=char,
             run_count=run_count
         )
-        filter_append_gacha(ioc_list, gacha, char_id, is_active, include_future)
+        timeline.add('ioc', gacha)
 
     # Parse iosg
     iosg_data = filter(lambda item: item['GachaSelectListType'] == 3, gachaselect_data)
@@ -150,22 +170,15 @@ async def get_gacha(md: MasterData, char_id: int|None=None, is_active=True, incl
                 char_id=char,
                 run_count=run_count
             )
-            filter_append_gacha(iosg_list, gacha, char_id, is_active, include_future)
+            timeline.add('iosg', gacha)
             
     # Parse eminence
     for banner in eminence_data:
-        banner_data = None
-        run = parse_run(banner['StartTimeFixJST'], banner['EndTimeFixJST'])
-        for _id in eminence_ids:  # No link between gachacase and select list
-            banner_data = gachaselect_lookup[_id]
-            banner_run = parse_run(banner_data['StartTimeFixJST'], banner_data['EndTimeFixJST'])
-            if run == banner_run:
-                eminence_ids.remove(_id)
-                break
-
+        banner_data = match_select_lists(eminence_lists, banner)
         if not banner_data:
             continue
         
+        run = parse_run(banner['StartTimeFixJST'], banner['EndTimeFixJST'])
         gacha_list = []
         for character in banner_data['CharacterIdList']:
             char = int(character)
@@ -183,12 +196,10 @@ async def get_gacha(md: MasterData, char_id: int|None=None, is_active=True, incl
             **banner,
             banners=gacha_list
         )
-        filter_append_gacha(eminence_list, eminence_group, char_id, is_active, include_future)
-
-    return schemas.GachaPickupBanners(
-        fleeting=fleeting_list,
-        ioc=ioc_list,
-        iosg=iosg_list,
-        chosen=chosen_list,
-        eminence=eminence_list
-    )
\ No newline at end of file
+        timeline.add('eminence', eminence_group)
+
+    return timeline
+
+async def get_gacha(md: MasterData, char_id: int|None=None, is_active=True, include_future=False) -> schemas.GachaPickupBanners:
+    timeline = await get_gacha_timeline(md)
+    return timeline.filter(char_id, is_active, include_future)
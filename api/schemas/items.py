@@ -1,8 +1,15 @@
+from collections.abc import Mapping
+
+from pydantic import ValidationError
+
 from api.schemas import requests
-from api.utils.masterdata import MasterData
+from api.utils.masterdata import MasterData, cache_derived
 from api.utils.error import APIError
 from common import enums, schemas
 
+from api.utils.logger import get_logger
+logger = get_logger(__name__)
+
 '''
 # [Description("宝箱抽選タイプ")]
 class TreasureChestLotteryType(_Enum):
@@ -29,38 +36,67 @@ async def get_rune(md: MasterData, payload: requests.RuneRequest):
     except StopIteration:
         raise APIError('Rune could not be found')
 
+class ItemResolver:
+    '''Item models of every item type by (ItemType, ItemId)'''
+    # Item types with their own MB. Everything else is in ItemMB.
+    DEDICATED_TYPES = {
+        enums.ItemType.EquipmentFragment,
+        enums.ItemType.Character,
+        enums.ItemType.CharacterFragment,
+        enums.ItemType.EquipmentSetMaterial,
+        enums.ItemType.Sphere,
+        enums.ItemType.TreasureChest,
+    }
+
+    def __init__(self):
+        self.items: dict[tuple[int, int], schemas.ItemBase] = {}
+
+    def add(self, item_type: int, item_id: int, model: type[schemas.ItemBase], data: Mapping, **kwargs) -> None:
+        '''Rows that fail validation are left out and resolve as not found'''
+        try:
+            self.items.setdefault((item_type, item_id), model(**data, **kwargs))
+        except ValidationError as e:
+            logger.warning(f'Skipping item {item_type}-{item_id}: {e.error_count()} validation errors')
+
+    def resolve(self, item_type: int, item_id: int) -> schemas.ItemBase:
+        '''Returns a copy, safe to translate'''
+        item = self.items.get((item_type, item_id))
+        if item is None:
+            raise APIError('Item could not be found or given item type is not supported.')
+        return item.model_copy(deep=True)
+
+@cache_derived
+async def get_item_resolver(md: MasterData) -> ItemResolver:
+    resolver = ItemResolver()
+    for item_data in await md.get_MB('ItemMB'):
+        if (item_type := item_data['ItemType']) in ItemResolver.DEDICATED_TYPES:
+            continue
+        model = schemas.QuickTicket if item_type == enums.ItemType.QuestQuickTicket else schemas.ItemBase
+        resolver.add(item_type, item_data['ItemId'], model, item_data)
+
+    for equip_frag_data in await md.get_MB('EquipmentCompositeMB'):
+        if equip_data := await md.search_id(equip_frag_data['EquipmentId'], 'EquipmentMB'):
+            resolver.add(
+                enums.ItemType.EquipmentFragment, equip_frag_data['Id'], schemas.EquipmentFragment, equip_frag_data,
+                icon=equip_data['IconId'], equip_name=equip_data['NameKey']
+            )
+    for char_data in await md.get_MB('CharacterMB'):
+        resolver.add(enums.ItemType.Character, char_data['Id'], schemas.CharacterItem, char_data)
+        resolver.add(enums.ItemType.CharacterFragment, char_data['Id'], schemas.CharacterFragment, char_data)
+    for equip_setm_data in await md.get_MB('EquipmentSetMaterialMB'):
+        resolver.add(enums.ItemType.EquipmentSetMaterial, equip_setm_data['Id'], schemas.EquipmentSetMaterial, equip_setm_data)
+    for rune_data in await md.get_MB('SphereMB'):
+        resolver.add(enums.ItemType.Sphere, rune_data['Id'], schemas.Rune, rune_data)
+    for treasure_data in await md.get_MB('TreasureChestMB'):
+        resolver.add(
+            enums.ItemType.TreasureChest, treasure_data['Id'], schemas.TreasureChest, treasure_data,
+            ItemId=treasure_data['Id'], ItemType=enums.ItemType.TreasureChest
+        )
+    return resolver
+
 async def get_item(md: MasterData, payload: requests.ItemRequest) -> schemas.ItemBase:
-    try:
-        if (item_type := payload.item_type) == enums.ItemType.EquipmentFragment:
-            equip_frag_data = await md.search_id(payload.item_id, 'EquipmentCompositeMB')
-            equip_data = await md.search_id(equip_frag_data['EquipmentId'], 'EquipmentMB')
-            item = schemas.EquipmentFragment(**equip_frag_data, icon=equip_data['IconId'], equip_name=equip_data['NameKey'])
-        elif item_type == enums.ItemType.Character:  
-            char_data = await md.search_id(payload.item_id, 'CharacterMB')
-            item = schemas.CharacterItem(**char_data)
-        elif item_type == enums.ItemType.CharacterFragment:
-            char_data = await md.search_id(payload.item_id, 'CharacterMB')
-            item = schemas.CharacterFragment(**char_data)
-        elif item_type == enums.ItemType.EquipmentSetMaterial:
-            equip_setm_data = await md.search_id(payload.item_id, 'EquipmentSetMaterialMB')
-            item = schemas.EquipmentSetMaterial(**equip_setm_data)
-        elif item_type == enums.ItemType.Sphere:  # Rune
-            rune_data = await md.search_id(payload.item_id, 'SphereMB')
-            item = schemas.Rune(**rune_data)
-        elif item_type == enums.ItemType.TreasureChest:
-            treasure_data = await md.search_id(payload.item_id, 'TreasureChestMB')
-            item = schemas.TreasureChest(**treasure_data, ItemId=payload.item_id, ItemType=item_type)
-        else:
-            item_data = next(await md.search_filter('ItemMB', ItemId=payload.item_id, ItemType=payload.item_type))
-            if item_type == enums.ItemType.QuestQuickTicket:
-                item = schemas.QuickTicket(**item_data)
-            else:
-                item = schemas.ItemBase(**item_data)
-        return item
-    except TypeError:  # None result from search_id
-        raise APIError('Item could not be found.')
-    except StopIteration:  # Not found
-        raise APIError('Item could not be found or given item type is not supported.')
+    resolver = await get_item_resolver(md)
+    return resolver.resolve(payload.item_type, payload.item_id)
 
 async def get_runes(md: MasterData, category: enums.RuneType|None = None) -> list[schemas.Rune]:
     if category is None:
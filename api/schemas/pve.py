@@ -9,18 +9,11 @@ logger = get_logger(__name__)
 async def parse_quest_enemies(md: MasterData, quest_id: int) -> list[dict]:
     first_enemy = int(f'{enums.EnemyType.BossBattle}{quest_id:05d}01')
     end = int(f'{enums.EnemyType.BossBattle}{quest_id+1:05d}00') # id must be lower than end
-    enemy_it = await md.search_consecutive('BossBattleEnemyMB', 'Id', first_enemy)
-    enemies = []
-    for enemy in enemy_it:
-        if enemy['Id'] > end:
-            break
-        enemies.append(enemy)
-    
-    return enemies
+    return await md.search_range('BossBattleEnemyMB', 'Id', first_enemy, end)
 
 async def parse_tower_enemies(md: MasterData, enemy_list: list[int]) -> list[dict]:
     first_enemy = enemy_list[0]
-    enemy_it = await md.search_consecutive('TowerBattleEnemyMB', 'Id', first_enemy)
+    enemy_it = await md.search_range('TowerBattleEnemyMB', 'Id', first_enemy, max(enemy_list))
     enemies = []
     for enemy in enemy_it:
         if enemy.get('Id') not in enemy_list:
@@ -1,6 +1,8 @@
+from re import fullmatch
+
 from fastapi import Query
 from pydantic import BaseModel, Field, model_validator
-from typing import Literal
+from typing import ClassVar, Literal
 
 from api.utils.error import APIError
 from common import enums
@@ -26,6 +28,32 @@ class ArcanaRequest(BaseModel):
         Query(None, description='Parameter change type filter: 1-Addition, 2-AdditionPercent, 3-CharacterLevelConstantMultiplicationAddition'))
     level_bonus: bool|None = Field(Query(None, description='Level bonus filter. Set true to only show arcana giving bonus party level. Set false to hide. Defaults to None (no filter)'))
 
+class BaseStatRequest(BaseModel):
+    MAX_STATS: ClassVar[int] = 50000  # levels * characters per request, all characters if char_id is None
+
+    char_id: list[int]|None = Field(Query(None), description='Filter by a list of character IDs. Defaults to all characters.')
+    rarity: enums.CharacterRarity = Field(Query(..., examples=[enums.CharacterRarity.LR]))
+    start: str = Field(Query('1.0', description='First level as "*Level*.*SubLevel*", e.g. "240.1". "240" is the same as "240.0"'))
+    end: str|None = Field(Query(None, description=f'Last level (inclusive). Defaults to start. Levels * characters is limited to {MAX_STATS}.'))
+
+    @model_validator(mode='after')
+    def validate(self):
+        for name in ('start', 'end'):
+            level = getattr(self, name)
+            if level is None:
+                continue
+            if level.isdigit():
+                level = f'{int(level)}.0'
+            if fullmatch(r'^[1-9]\d*\.\d$', level) is None:
+                raise APIError(f'Level {level} is not valid. Example valid inputs. 1, 1.0, 240, 240.0, 240.1...')
+            setattr(self, name, level)
+        if self.end is None:
+            self.end = self.start
+        return self
+
+class LevelLinkRequest(BaseModel):
+    start: str = Field(Query(..., examples=['240.0'], description='Current level as "*Level*.*SubLevel*"'))
+    end: str|None = Field(Query(None, description='Target level. Defaults to the next multiple of 10.'))
 
 # Equipment
 class EquipmentRequest(BaseModel):
@@ -66,6 +94,22 @@ class EquipmentCostRequest(BaseModel):
     equip_id: int = Field(Query(..., description='Target Equipment. Use /equipment/search or /equipment/unique/search to get id.'))
     upgrade: int = Field(Query(0, ge=0, description='Target upgrade level. Default 0.'))
 
+class EquipmentPlanPiece(BaseModel):
+    equip_id: int = Field(..., description='Target Equipment. Use /equipment/search or /equipment/unique/search to get id.')
+    from_rarity: enums.ItemRarity|None = Field(None, description='Rarity of the equipment owned. Defaults to None, synthesizing the equipment.')
+    from_level: int = Field(0, ge=0, description='Level of the equipment owned.')
+    from_upgrade: int = Field(0, ge=0, description='Upgrade level of the equipment owned.')
+    to_upgrade: int = Field(0, ge=0, description='Target upgrade level.')
+
+    @model_validator(mode='after')
+    def validate(self):
+        if self.from_upgrade > self.to_upgrade:
+            raise APIError(f'Upgrade target level({self.to_upgrade}) cannot be lower than start level({self.from_upgrade})')
+        return self
+
+class EquipmentPlanRequest(BaseModel):
+    pieces: list[EquipmentPlanPiece] = Field(..., min_length=1, max_length=36, description='Up to 36 pieces (6 slots for 6 characters)')
+
 # Events
 class GachaRequest(BaseModel):
     char_id: int|None = Field(None, description='Character ID to filter by')
@@ -1,6 +1,6 @@
-from api.utils.masterdata import MasterData
+from api.utils.masterdata import MasterData, cache_model
 from api.utils.error import APIError
-from api.schemas.equipment import search_uw_info
+from api.schemas.equipment import get_uw_map
 from api.schemas.string_keys import get_uw_desc_strings
 from common import schemas
 
@@ -12,14 +12,10 @@ async def find_character_skill_ids(md: MasterData, id: int) -> tuple[list[int],
     return char_data.get('ActiveSkillIds'), char_data.get('PassiveSkillIds')
 
 async def find_uw_descriptions(md: MasterData, character: int) -> schemas.UWDescriptions|None:
-    eq_data = await search_uw_info(md, character)
-    if not eq_data:
+    uw = (await get_uw_map(md)).get(character)
+    if uw is None or uw.description is None:
         return None
-    desc_id = eq_data.get('EquipmentExclusiveSkillDescriptionId')
-    if desc_id == 0:
-        return None
-    uw_desc = await md.search_id(desc_id, 'EquipmentExclusiveSkillDescriptionMB')
-    return schemas.UWDescriptions(**uw_desc)
+    return schemas.UWDescriptions(**uw.description)
 
 async def parse_skill(md: MasterData, id: int) -> schemas.ActiveSkill|schemas.PassiveSkill:
     skill_data = await md.search_id(id, 'ActiveSkillMB')
@@ -31,9 +27,11 @@ async def parse_skill(md: MasterData, id: int) -> schemas.ActiveSkill|schemas.Pa
             return schemas.PassiveSkill(**skill_data)
     raise APIError(f'Could not find skill id of {id}')
 
+@cache_model
 async def get_skill_id(md: MasterData, skill_id: int) -> schemas.ActiveSkill|schemas.PassiveSkill:
     return await parse_skill(md, skill_id)
 
+@cache_model
 async def get_skills_char(md: MasterData, char_id: int) -> schemas.Skills:
     active_ids, passives_ids = await find_character_skill_ids(md, char_id)
     actives = []
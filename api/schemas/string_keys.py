@@ -1,7 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.crud.character import get_char_ids
-from api.crud.string_keys import read_string_key_language_bulk, read_string_key_language, CHARACTER_NAME_KEY, CHARACTER_TITLE_KEY, UW_DESCRIPTION_KEY
+from api.crud.string_keys import read_string_key_language_bulk, read_string_key_language, string_table, CHARACTER_NAME_KEY, CHARACTER_TITLE_KEY, UW_DESCRIPTION_KEY
 from api.utils.error import APIError
 from common import enums, schemas
 
@@ -34,13 +34,13 @@ async def get_char_names(session: AsyncSession, language: enums.Language) -> dic
 
     return names
 
-async def get_uw_desc_strings(session: AsyncSession, char_id: int, language: enums.Language) -> schemas.UWDescriptions|None:
+async def get_uw_desc_strings(char_id: int, language: enums.Language) -> schemas.UWDescriptions|None:
     '''Returns None if character doesn't have a UW or if the strings are not in data.'''
     desc1_key = UW_DESCRIPTION_KEY.format(char_id, 1)
     desc2_key = UW_DESCRIPTION_KEY.format(char_id, 2)
     desc3_key = UW_DESCRIPTION_KEY.format(char_id, 3)
 
-    descriptions = await read_string_key_language_bulk(session, [desc1_key, desc2_key, desc3_key], language)
+    descriptions = await string_table.lookup([desc1_key, desc2_key, desc3_key], language)
 
     if not descriptions:
         return None
@@ -0,0 +1,115 @@
+import sys
+from array import array
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any
+
+INT64_MIN = -2**63
+INT64_MAX = 2**63 - 1
+
+class _Missing:
+    '''Marks a key that is not present in a row'''
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return '<missing>'
+
+MISSING = _Missing()
+
+def _make_column(values: list) -> array|list:
+    '''
+    Stores all int (excluding bool) or all float columns in typed arrays.
+    Anything else, including columns with missing keys, stays a list.
+    '''
+    if values and all(type(value) is int for value in values):
+        if INT64_MIN <= min(values) and max(values) <= INT64_MAX:
+            return array('q', values)
+    elif values and all(type(value) is float for value in values):
+        return array('d', values)
+    return [sys.intern(value) if type(value) is str else value for value in values]
+
+class CompactRow(Mapping):
+    '''Read only dict-like view of a single CompactMB row'''
+    __slots__ = ('_mb', '_i')
+
+    def __init__(self, mb: 'CompactMB', i: int) -> None:
+        self._mb = mb
+        self._i = i
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._mb.columns[self._mb.key_index[key]][self._i]
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        i = self._i
+        return (
+            key for key, column in zip(self._mb.keys, self._mb.columns)
+            if column[i] is not MISSING
+        )
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+class CompactMB(Sequence):
+    '''
+    Columnar storage of a MasterBook.
+    All rows share one key schema and each key is stored as a single column.
+    Rows are accessed through CompactRow views which are created once and reused.
+    '''
+    def __init__(self, rows: list[dict]) -> None:
+        keys = {}  # dict to keep key order
+        for row in rows:
+            keys.update(dict.fromkeys(row))
+        self._set_columns({key: [row.get(key, MISSING) for row in rows] for key in keys}, len(rows))
+
+    @classmethod
+    def from_columns(cls, values: dict[str, list], count: int) -> 'CompactMB':
+        '''Builds from {key: column values} with MISSING for absent keys, see CompactBuilder'''
+        mb = cls.__new__(cls)
+        mb._set_columns(values, count)
+        return mb
+
+    def _set_columns(self, values: dict[str, list], count: int) -> None:
+        self.keys: tuple[str, ...] = tuple(sys.intern(key) for key in values)
+        self.key_index: dict[str, int] = {key: i for i, key in enumerate(self.keys)}
+        self.columns: list[array|list] = [_make_column(column) for column in values.values()]
+        self._rows = [CompactRow(self, i) for i in range(count)]
+
+    def __getitem__(self, i):
+        return self._rows[i]
+
+    def __iter__(self) -> Iterator[CompactRow]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+class CompactBuilder:
+    '''
+    Collects rows into CompactMB columns one row at a time,
+    so a streamed MB is never held as a list of row dicts.
+    '''
+    def __init__(self) -> None:
+        self.values: dict[str, list] = {}  # key -> column values, in order of first appearance
+        self.count = 0
+
+    def add(self, row: Mapping) -> None:
+        for key, value in row.items():
+            column = self.values.get(key)
+            if column is None:
+                column = self.values[sys.intern(key)] = [MISSING] * self.count
+            column.append(value)
+        self.count += 1
+        if len(row) < len(self.values):  # keys missing from this row
+            for column in self.values.values():
+                if len(column) < self.count:
+                    column.append(MISSING)
+
+    def build(self) -> CompactMB:
+        mb = CompactMB.from_columns(self.values, self.count)
+        self.values = {}
+        return mb
@@ -0,0 +1,194 @@
+import httpx
+import asyncio
+import os
+import tarfile
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Awaitable, Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+from api.utils.logger import get_logger
+logger = get_logger(__name__)
+
+T = TypeVar('T')
+type ChunkHandler[T] = Callable[[AsyncIterator[bytes]], Awaitable[T]]
+
+def _stat_key(path: Path) -> tuple[int, int, int]:
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+class MasterSource(ABC):
+    '''
+    Where MasterData reads the version, catalog and MB files from.
+    Paths are relative to the Master directory, e.g. 'version' or 'ItemMB.json'.
+    '''
+    async def get(self, path: str) -> bytes:
+        async def read(chunks: AsyncIterator[bytes]) -> bytes:
+            return b''.join([chunk async for chunk in chunks])
+        return await self.stream(path, read)
+
+    @abstractmethod
+    async def stream(self, path: str, handler: ChunkHandler[T], chunk_size: int = 64*1024) -> T:
+        '''Passes the file content to handler as an async iterator of chunks'''
+
+    @abstractmethod
+    async def get_conditional(self, path: str, validator: Any = None) -> tuple[bytes|None, Any]:
+        '''
+        Returns (None, validator) if the file did not change since validator was issued,
+        otherwise the content and a new validator. Validators are opaque, pass back what was returned.
+        '''
+
+    async def close(self) -> None:
+        pass
+
+class HttpSource(MasterSource):
+    '''Pooled HTTP/2 client with bounded concurrency. Retries connection errors, 429 and 5xx with exponential backoff.'''
+    BACKOFF = 0.5  # seconds, doubled every retry
+
+    def __init__(self, base_url: str, max_connections: int, max_concurrency: int, retries: int) -> None:
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=httpx.Timeout(10, connect=5),
+            headers={"Cache-Control": "no-cache"}  # remove when testing
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.retries = retries
+
+    async def _request(self, path: str, handler: Callable[[httpx.Response], Awaitable[T]], headers: dict|None = None) -> T:
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.semaphore:
+                    async with self.client.stream('GET', path, headers=headers) as resp:
+                        if resp.status_code != 429 and resp.status_code < 500:
+                            if resp.status_code != 304:  # Not Modified, for conditional requests
+                                resp.raise_for_status()
+                            return await handler(resp)
+                if attempt == self.retries:
+                    resp.raise_for_status()
+                logger.warning(f'{resp.status_code} fetching {path}, retrying ({attempt+1}/{self.retries})')
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise e
+                logger.warning(f'{type(e).__name__} fetching {path}, retrying ({attempt+1}/{self.retries})')
+            await asyncio.sleep(self.BACKOFF * 2**attempt)
+
+    async def stream(self, path: str, handler: ChunkHandler[T], chunk_size: int = 64*1024) -> T:
+        return await self._request(path, lambda resp: handler(resp.aiter_bytes(chunk_size)))
+
+    async def get_conditional(self, path: str, validator: dict|None = None) -> tuple[bytes|None, dict|None]:
+        '''Validators are the If-None-Match / If-Modified-Since headers for the next request'''
+        async def read(resp: httpx.Response) -> tuple[bytes|None, dict|None]:
+            if resp.status_code == 304:
+                return None, validator
+            content = await resp.aread()
+            if etag := resp.headers.get('ETag'):
+                return content, {'If-None-Match': etag}
+            if last_modified := resp.headers.get('Last-Modified'):
+                return content, {'If-Modified-Since': last_modified}
+            return content, None
+        return await self._request(path, read, validator)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+class DirectorySource(MasterSource):
+    '''Local Master directory, e.g. a checkout of MementoMori-data or recorded fixtures'''
+    def __init__(self, root: Path|str) -> None:
+        self.root = Path(root)
+
+    async def get(self, path: str) -> bytes:
+        return await asyncio.to_thread((self.root / path).read_bytes)
+
+    async def stream(self, path: str, handler: ChunkHandler[T], chunk_size: int = 64*1024) -> T:
+        f = await asyncio.to_thread(open, self.root / path, 'rb')
+        try:
+            async def chunks() -> AsyncIterator[bytes]:
+                while chunk := await asyncio.to_thread(f.read, chunk_size):
+                    yield chunk
+            return await handler(chunks())
+        finally:
+            f.close()
+
+    async def get_conditional(self, path: str, validator: tuple|None = None) -> tuple[bytes|None, tuple]:
+        stat_key = await asyncio.to_thread(_stat_key, self.root / path)
+        if stat_key == validator:
+            return None, validator
+        return await self.get(path), stat_key
+
+class TarballSource(MasterSource):
+    '''
+    Master files inside a tar archive (optionally compressed). Members are looked up by
+    file name so the archive may keep its own directory prefix.
+    The archive is reopened when the file on disk is replaced.
+    Prefer uncompressed archives, compressed ones are slow to seek.
+    '''
+    def __init__(self, path: Path|str) -> None:
+        self.path = Path(path)
+        self.lock = threading.Lock()  # members share one file object
+        self.tar: tarfile.TarFile|None = None
+        self.stat_key = None
+        self.members: dict[str, tarfile.TarInfo] = {}
+
+    def _open(self) -> tarfile.TarFile:
+        stat_key = _stat_key(self.path)
+        if self.tar is None or stat_key != self.stat_key:
+            if self.tar is not None:
+                self.tar.close()
+            self.tar = tarfile.open(self.path)
+            self.members = {
+                member.name.rsplit('/', 1)[-1]: member
+                for member in self.tar.getmembers() if member.isfile()
+            }
+            self.stat_key = stat_key
+        return self.tar
+
+    def _read(self, path: str, offset: int, size: int) -> bytes:
+        with self.lock:
+            tar = self._open()
+            member = self.members.get(path)
+            if member is None:
+                raise FileNotFoundError(f'{path} not in {self.path}')
+            f = tar.extractfile(member)
+            f.seek(offset)
+            return f.read(size)
+
+    async def get(self, path: str) -> bytes:
+        return await asyncio.to_thread(self._read, path, 0, -1)
+
+    async def stream(self, path: str, handler: ChunkHandler[T], chunk_size: int = 64*1024) -> T:
+        async def chunks() -> AsyncIterator[bytes]:
+            offset = 0
+            while chunk := await asyncio.to_thread(self._read, path, offset, chunk_size):
+                offset += len(chunk)
+                yield chunk
+        return await handler(chunks())
+
+    async def get_conditional(self, path: str, validator: tuple|None = None) -> tuple[bytes|None, tuple]:
+        '''Any member is considered changed when the archive is replaced'''
+        stat_key = await asyncio.to_thread(_stat_key, self.path)
+        if stat_key == validator:
+            return None, validator
+        return await self.get(path), stat_key
+
+    async def close(self) -> None:
+        with self.lock:
+            if self.tar is not None:
+                self.tar.close()
+                self.tar = None
+
+def make_source(location: str, max_connections: int, max_concurrency: int, retries: int) -> MasterSource:
+    '''Picks a source from an http(s) URL, a tar archive or a Master directory path'''
+    if location.startswith(('http://', 'https://')):
+        return HttpSource(location, max_connections, max_concurrency, retries)
+    path = Path(location)
+    if path.is_dir():
+        return DirectorySource(path)
+    if path.is_file() and tarfile.is_tarfile(path):
+        return TarballSource(path)
+    raise ValueError(f'Unknown master source {location}')
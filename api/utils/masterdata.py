@@ -1,111 +1,599 @@
-import httpx
 import asyncio
-from collections.abc import Iterator
+import fcntl
+import json
+import os
+import random
+import sys
+from bisect import bisect_left, bisect_right
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any
 
+import ijson
+from pydantic import BaseModel
+
+from api.utils.compact import CompactBuilder, CompactMB
+from api.utils.master_source import MasterSource, make_source
 from api.utils.logger import get_logger
+from api.utils.snapshot import Snapshot, SnapshotMB, write_snapshot
 
 logger = get_logger(__name__)
 
+type IndexKey = tuple[str, ...]
+
+class LoadedMB:
+    '''MB rows with their indexes. Only sorted indexes are added after creation.'''
+    __slots__ = ('data', 'id_index', 'indexes', 'sorted_indexes')
+
+    def __init__(self, data: list[dict], id_index: dict[int, dict], indexes: dict[IndexKey, dict[tuple, list[dict]]]) -> None:
+        self.data = data
+        self.id_index = id_index  # {Id: row}
+        self.indexes = indexes  # {keys: {values: rows}}
+        self.sorted_indexes: dict[str, tuple[list, list[dict]]] = {}  # {key: (sorted values, rows)}
+
+class Generation:
+    '''
+    One master version with its catalog, MBs and indexes.
+    A published generation is never modified, except that MBs missing from it
+    are added when they are first loaded. Updates build a new generation.
+    '''
+    __slots__ = ('version', 'catalog', 'mbs', 'cache', 'building')
+
+    def __init__(self, version: str|None = None, catalog: dict|None = None, mbs: dict[str, LoadedMB]|None = None) -> None:
+        self.version = version
+        self.catalog = catalog if catalog is not None else {}
+        self.mbs = mbs if mbs is not None else {}
+        self.cache: dict[tuple, Any] = {}  # (builder, args, kwargs) -> value, see cache_model and cache_derived
+        self.building: dict[tuple, asyncio.Task] = {}  # in-flight builds by cache key
+
+# Generation used for the lifetime of a request. Set by the pin_generation middleware.
+_pinned_generation: ContextVar[Generation|None] = ContextVar('pinned_generation', default=None)
+
+_MISSING = object()  # cache miss, builders may return None
+
+async def _get_cached(md: 'MasterData', builder: Callable[..., Awaitable[Any]], args: tuple, kwargs: dict) -> Any:
+    '''
+    Single-flight build of a cached value, same as MasterData._load_missing_mb.
+    Concurrent misses for the same key await one shared build. A cancelled caller does not cancel it.
+    '''
+    generation = md.generation
+    key = (builder, args, tuple(kwargs.items()))
+    value = generation.cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    task = generation.building.get(key)
+    if task is None:
+        async def build() -> Any:
+            value = await builder(md, *args, **kwargs)
+            generation.cache[key] = value
+            return value
+        task = asyncio.create_task(build())
+        generation.building[key] = task
+        task.add_done_callback(lambda _: generation.building.pop(key, None))
+    return await asyncio.shield(task)
+
+def cache_model[M: BaseModel](builder: Callable[..., Awaitable[M]]) -> Callable[..., Awaitable[M]]:
+    '''
+    Caches the untranslated model built from MasterData in the pinned generation,
+    keyed by (builder, args). A new generation starts empty so swaps invalidate it.
+    Returns a deep copy which can be translated or modified freely. Args must be hashable.
+    '''
+    @wraps(builder)
+    async def wrapper(md: 'MasterData', *args, **kwargs) -> M:
+        model = await _get_cached(md, builder, args, kwargs)
+        return model.model_copy(deep=True)
+    return wrapper
+
+def cache_derived[R](builder: Callable[..., Awaitable[R]]) -> Callable[..., Awaitable[R]]:
+    '''
+    Same as cache_model for lookup tables and other data derived from MasterData.
+    The cached object itself is returned and must not be modified.
+    '''
+    @wraps(builder)
+    async def wrapper(md: 'MasterData', *args, **kwargs) -> R:
+        return await _get_cached(md, builder, args, kwargs)
+    return wrapper
+
 class MasterData:
     BASE_URL = 'https://raw.githubusercontent.com/ScobraCK/MementoMori-data/main/Master/'
 
-    def __init__(self, preload: bool = False) -> None:
-        self.data = {}
-        self.catalog = {}
-        self.version = None
-        self.lock = asyncio.Lock()
+    # Composite key indexes used by search_filter. Keys are sorted on init.
+    INDEXES: dict[str, list[IndexKey]] = {
+        'EquipmentMB': [
+            ('RarityFlags', 'EquipmentLv', 'SlotType', 'EquippedJobFlags', 'ExclusiveEffectId'),
+            ('RarityFlags', 'EquipmentLv', 'SlotType', 'EquippedJobFlags', 'QualityLv', 'ExclusiveEffectId'),
+        ],
+        'TowerBattleQuestMB': [('TowerType', 'Floor')],
+        'CharacterDetailVoiceMB': [('CharacterId',)],
+        'CharacterStoryMB': [('CharacterId',)],
+        'ItemMB': [('ItemId', 'ItemType')],
+        'SphereMB': [('CategoryId',)],
+    }
+
+    MAX_CONNECTIONS = int(os.getenv('MASTER_MAX_CONNECTIONS', 10))
+    MAX_CONCURRENCY = int(os.getenv('MASTER_MAX_CONCURRENCY', 8))  # concurrent requests during bulk fetches
+    RETRIES = int(os.getenv('MASTER_RETRIES', 3))
+    SOURCE = os.getenv('MASTER_SOURCE', BASE_URL)  # http(s) URL, Master directory or tar archive
+    POLL_INTERVAL = float(os.getenv('MASTER_POLL_INTERVAL', 300))  # seconds between version checks, 0 to disable
+    POLL_JITTER = float(os.getenv('MASTER_POLL_JITTER', 30))  # random extra delay so workers don't poll in lockstep
+    STREAM_MBS = {'AutoBattleEnemyMB', 'BossBattleEnemyMB'}  # large files, parsed incrementally into CompactMB
+    STREAM_CHUNK_SIZE = 64 * 1024
+    COMPACT = os.getenv('MASTER_COMPACT', '').lower() in ('1', 'true')  # store MBs as CompactMB
+    SNAPSHOT = os.getenv('MASTER_SNAPSHOT', '').lower() in ('1', 'true')  # share MBs between workers through a mmap snapshot
+    CACHE_DIR = Path(os.getenv('MASTER_CACHE_DIR', 'cache/master'))  # MBs stored as {mb}.{Hash}.json
+
+    def __init__(
+        self,
+        preload: bool = False,
+        max_connections: int|None = None,
+        max_concurrency: int|None = None,
+        retries: int|None = None,
+        cache_dir: Path|str|None = None,
+        compact: bool|None = None,
+        snapshot: bool|None = None,
+        source: MasterSource|str|None = None
+    ) -> None:
+        '''Create inside a running event loop (FastAPI lifespan) and close with close().'''
+        if not isinstance(source, MasterSource):
+            source = make_source(
+                source or self.SOURCE,
+                max_connections or self.MAX_CONNECTIONS,
+                max_concurrency or self.MAX_CONCURRENCY,
+                self.RETRIES if retries is None else retries
+            )
+        self.source = source
+        self.validated: dict[str, tuple[Any, bytes]] = {}  # path -> (validator, content) of version and catalog
+        self.poll_lock_file = None  # held by the one worker that runs poll callbacks
+        self.cache_dir = Path(cache_dir) if cache_dir else self.CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.compact = self.COMPACT if compact is None else compact
+        self.use_snapshot = self.SNAPSHOT if snapshot is None else snapshot
+        self.current = Generation()
+        self.index_keys: dict[str, set[IndexKey]] = {
+            mb: {tuple(sorted(keys)) for keys in key_list}
+            for mb, key_list in self.INDEXES.items()
+        }
+        self.lock = asyncio.Lock()  # serializes preload and version updates
+        self.loading: dict[tuple[str|None, str], asyncio.Task] = {}  # in-flight loads of missing MBs by (version, mb)
         if preload:
             asyncio.create_task(self._preload())
 
+    async def close(self) -> None:
+        await self.source.close()
+        if self.poll_lock_file:
+            self.poll_lock_file.close()
+
+    @property
+    def generation(self) -> Generation:
+        '''Generation pinned to the running request, otherwise the latest one'''
+        return _pinned_generation.get() or self.current
+
+    @property
+    def version(self) -> str|None:
+        return self.generation.version
+
+    @property
+    def catalog(self) -> dict:
+        return self.generation.catalog
+
+    def pin(self) -> Generation:
+        '''Pins the latest generation to the running context so every read in it sees one version'''
+        generation = self.current
+        _pinned_generation.set(generation)
+        return generation
+
+    def _publish(self, generation: Generation) -> None:
+        '''Swaps in a new generation. A pinned caller is re-pinned so it sees its own update.'''
+        self.current = generation
+        if _pinned_generation.get() is not None:
+            _pinned_generation.set(generation)
+
+    async def _get_validated(self, path: str) -> bytes:
+        '''Conditional GET. Reuses the last content when the source reports no change.'''
+        validator, content = self.validated.get(path, (None, b''))
+        new_content, new_validator = await self.source.get_conditional(path, validator)
+        if new_content is None:
+            return content
+        self.validated[path] = (new_validator, new_content)
+        return new_content
+
     async def _fetch_version(self) -> str:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f'{self.BASE_URL}version',
-                headers={"Cache-Control": "no-cache"})
-            resp.raise_for_status()
-            return resp.text.strip()
+        content = await self._get_validated('version')
+        return content.decode().strip()
 
     async def _fetch_catalog(self) -> dict:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f'{self.BASE_URL}master-catalog.json',
-                headers={"Cache-Control": "no-cache"})
-            resp.raise_for_status()
-            return resp.json()['MasterBookInfoMap']
-
-    async def _fetch_MB(self, mb: str) -> dict:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f'{self.BASE_URL}{mb}.json',
-                headers={"Cache-Control": "no-cache"},  # remove when testing
-                timeout=10
-                )
-            resp.raise_for_status()
-            return resp.json()
+        content = await self._get_validated('master-catalog.json')
+        return json.loads(content)['MasterBookInfoMap']
+
+    @classmethod
+    def _intern_keys(cls, obj: Any) -> Any:
+        '''Interns dict keys so identically keyed rows share key strings'''
+        if isinstance(obj, dict):
+            return {sys.intern(key): cls._intern_keys(value) for key, value in obj.items()}
+        if isinstance(obj, list):
+            return [cls._intern_keys(item) for item in obj]
+        return obj
+
+    def _cache_path(self, mb: str, mb_hash: str) -> Path:
+        return self.cache_dir / f'{mb}.{mb_hash}.json'
+
+    def _read_cache(self, mb: str, mb_hash: str) -> list[dict]|CompactMB|None:
+        path = self._cache_path(mb, mb_hash)
+        try:
+            if mb in self.STREAM_MBS:
+                with open(path, 'rb') as f:
+                    builder = CompactBuilder()
+                    for row in ijson.items(f, 'item', use_float=True):
+                        builder.add(self._intern_keys(row))
+                    return builder.build()
+            return json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, ijson.JSONError) as e:
+            logger.warning(f'Ignoring broken cache file {path}: {e}')
+            return None
+
+    def _commit_cache(self, mb: str, tmp_path: Path, path: Path) -> None:
+        '''Moves a fully written file into place and removes cached files of older hashes'''
+        os.replace(tmp_path, path)
+        for old_path in self.cache_dir.glob(f'{mb}.*.json'):
+            if old_path != path:
+                old_path.unlink(missing_ok=True)
+
+    def _tmp_cache_path(self, path: Path) -> Path:
+        return path.with_name(f'{path.name}.{os.getpid()}.tmp')
+
+    def _write_cache(self, mb: str, mb_hash: str, content: bytes) -> None:
+        path = self._cache_path(mb, mb_hash)
+        tmp_path = self._tmp_cache_path(path)
+        tmp_path.write_bytes(content)
+        self._commit_cache(mb, tmp_path, path)
+
+    async def _stream_MB(self, mb: str, mb_hash: str|None = None) -> CompactMB:
+        '''
+        Parses rows into CompactMB columns as chunks arrive instead of holding the whole document or row dicts.
+        The raw chunks are written straight to the cache file if mb_hash is given.
+        Parsing and cache writes run in a worker thread to keep the event loop free.
+        '''
+        async def parse(chunks: AsyncIterator[bytes]) -> CompactMB:
+            builder = CompactBuilder()
+            parsed = ijson.sendable_list()
+            parser = ijson.items_coro(parsed, 'item', use_float=True)
+            cache_path = self._cache_path(mb, mb_hash) if mb_hash else None
+            cache_file = None
+            if cache_path:
+                try:
+                    cache_file = await asyncio.to_thread(open, self._tmp_cache_path(cache_path), 'wb')
+                except OSError as e:
+                    logger.error(f'Failed to cache {mb}: {e}')
+
+            def feed(chunk: bytes) -> None:
+                parser.send(chunk)
+                for row in parsed:
+                    builder.add(self._intern_keys(row))
+                del parsed[:]
+                if cache_file:
+                    cache_file.write(chunk)
+
+            def finish() -> CompactMB:
+                parser.close()
+                for row in parsed:
+                    builder.add(self._intern_keys(row))
+                if cache_file:
+                    cache_file.close()
+                    self._commit_cache(mb, self._tmp_cache_path(cache_path), cache_path)
+                return builder.build()
+
+            try:
+                async for chunk in chunks:
+                    await asyncio.to_thread(feed, chunk)
+                return await asyncio.to_thread(finish)
+            except BaseException:
+                if cache_file:
+                    cache_file.close()
+                    self._tmp_cache_path(cache_path).unlink(missing_ok=True)
+                raise
+        return await self.source.stream(f'{mb}.json', parse, self.STREAM_CHUNK_SIZE)
+
+    async def _fetch_MB(self, mb: str, mb_hash: str|None = None) -> list[dict]|CompactMB:
+        '''Loads from the disk cache if mb_hash is cached, otherwise downloads and caches it.'''
+        if mb_hash:
+            mb_data = await asyncio.to_thread(self._read_cache, mb, mb_hash)
+            if mb_data is not None:
+                return mb_data
+
+        if mb in self.STREAM_MBS:
+            return await self._stream_MB(mb, mb_hash)
+
+        content = await self.source.get(f'{mb}.json')
+        mb_data = await asyncio.to_thread(json.loads, content)
+        if mb_hash:
+            try:
+                await asyncio.to_thread(self._write_cache, mb, mb_hash, content)
+            except OSError as e:
+                logger.error(f'Failed to cache {mb}: {e}')
+        return mb_data
 
     async def _preload(self, exclude: set|None = None) -> list[str]:
         if exclude is None:
-            exclude = {'AutoBattleEnemyMB', 'BossBattleEnemyMB'}  # large file
+            exclude = self.STREAM_MBS  # large file
         async with self.lock:
-            self.catalog = await self._fetch_catalog()
-            self.version = await self._fetch_version()
-            updates = [mb for mb in self.catalog.keys() if mb not in exclude]
-            tasks = [self._fetch_and_store_mb(mb) for mb in updates]
-            await asyncio.gather(*tasks)
+            catalog = await self._fetch_catalog()
+            version = await self._fetch_version()
+            if not self.use_snapshot:
+                return await self._preload_mbs(version, catalog, exclude)
+
+            # only one worker downloads and writes the snapshot, the rest wait and map it
+            async with self._file_lock('snapshot.lock'):
+                generation = await self._snapshot_generation(version)
+                if generation is None:
+                    await self._preload_mbs(version, catalog, exclude)
+                    generation = await self._save_snapshot(self.current)
+                self._publish(generation)
+
+        return list(generation.mbs)
 
+    async def _preload_mbs(self, version: str, catalog: dict, exclude: set) -> list[str]:
+        '''Publishes an empty generation and fills it, so requests during preload share the loads'''
+        generation = Generation(version, catalog)
+        self._publish(generation)
+        updates = [mb for mb in catalog.keys() if mb not in exclude]
+        tasks = [self._load_missing_mb(generation, mb) for mb in updates]
+        await asyncio.gather(*tasks)
         return updates
 
-    async def _fetch_and_store_mb(self, mb: str) -> None:
-        self.data[mb] = await self._fetch_MB(mb)
+    def _snapshot_path(self, version: str) -> Path:
+        return self.cache_dir / f'snapshot.{version}.bin'
+
+    @asynccontextmanager
+    async def _file_lock(self, name: str):
+        '''File lock shared by all workers using the same cache directory'''
+        with open(self.cache_dir / name, 'wb') as f:
+            await asyncio.to_thread(fcntl.flock, f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _open_snapshot(self, version: str) -> Snapshot|None:
+        path = self._snapshot_path(version)
+        try:
+            return Snapshot(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f'Ignoring broken snapshot {path}: {e}')
+            return None
+
+    def _write_snapshot(self, generation: Generation) -> None:
+        path = self._snapshot_path(generation.version)
+        data = {mb: loaded.data for mb, loaded in generation.mbs.items()}
+        write_snapshot(path, generation.version, generation.catalog, data, self.index_keys)
+        for old_path in self.cache_dir.glob('snapshot.*.bin'):
+            if old_path != path:
+                old_path.unlink(missing_ok=True)  # workers still mapping it keep their pages
+
+    async def _snapshot_generation(self, version: str, base: Generation|None = None) -> Generation|None:
+        '''Generation backed by the snapshot of version. MBs of base missing from the snapshot are kept.'''
+        snapshot = await asyncio.to_thread(self._open_snapshot, version)
+        if snapshot is None:
+            return None
+        mbs = dict(base.mbs) if base else {}
+        for mb, mb_data in snapshot.mbs.items():
+            mbs[mb] = await asyncio.to_thread(self._index_snapshot_mb, mb, mb_data)
+        return Generation(snapshot.version, snapshot.catalog, mbs)
+
+    async def _save_snapshot(self, generation: Generation) -> Generation:
+        '''Writes generation to a snapshot and returns it backed by the snapshot. Call while holding the snapshot lock.'''
+        try:
+            await asyncio.to_thread(self._write_snapshot, generation)
+        except OSError as e:
+            logger.error(f'Failed to write snapshot for {generation.version}: {e}')
+            return generation
+        logger.info(f'Wrote snapshot - {generation.version}')
+        return await self._snapshot_generation(generation.version, generation) or generation
+
+    @staticmethod
+    def _build_id_index(mb_data: list[dict]) -> dict[int, dict]:
+        '''Id -> row lookup. First row wins in case of duplicate ids, same as a linear search.'''
+        index = {}
+        for item in mb_data:
+            index.setdefault(item.get('Id'), item)
+        return index
+
+    @staticmethod
+    def _build_index(mb_data: list[dict], keys: IndexKey) -> dict[tuple, list[dict]]:
+        '''Groups rows by the values of keys. Row order is kept within each group.'''
+        index = {}
+        for item in mb_data:
+            index.setdefault(tuple(item.get(key) for key in keys), []).append(item)
+        return index
+
+    def _build_indexes(self, mb: str, mb_data: list[dict]) -> dict[IndexKey, dict[tuple, list[dict]]]:
+        return {
+            keys: self._build_index(mb_data, keys)
+            for keys in self.index_keys.get(mb, ())
+        }
+
+    async def _load_mb(self, mb: str, catalog: dict) -> LoadedMB:
+        '''Fetches an MB and builds its indexes without storing anything'''
+        mb_hash = catalog.get(mb, {}).get('Hash')
+        mb_data = await self._fetch_MB(mb, mb_hash)
+        if self.compact and not isinstance(mb_data, CompactMB):
+            mb_data = await asyncio.to_thread(CompactMB, mb_data)
+        return self._index_mb(mb, mb_data)
+
+    def _index_mb(self, mb: str, mb_data: list[dict]) -> LoadedMB:
+        return LoadedMB(mb_data, self._build_id_index(mb_data), self._build_indexes(mb, mb_data))
+
+    def _index_snapshot_mb(self, mb: str, mb_data: SnapshotMB) -> LoadedMB:
+        '''Uses the indexes stored in the snapshot. Only INDEXES missing from it are built.'''
+        indexes = {
+            keys: mb_data.indexes[keys] if keys in mb_data.indexes else self._build_index(mb_data, keys)
+            for keys in self.index_keys.get(mb, ())
+        }
+        return LoadedMB(mb_data, mb_data.id_index, indexes)
+
+    @staticmethod
+    def _get_sorted_index(loaded: LoadedMB, key: str) -> tuple[list, list[dict]]:
+        '''Rows sorted by key along with their key values for bisect. Built on first use.'''
+        if key not in loaded.sorted_indexes:
+            rows = sorted(
+                (item for item in loaded.data if item.get(key) is not None),
+                key=lambda item: item[key]
+            )
+            loaded.sorted_indexes[key] = ([item[key] for item in rows], rows)
+        return loaded.sorted_indexes[key]
+
+    async def _load_missing_mb(self, generation: Generation, mb: str) -> LoadedMB:
+        '''
+        Single-flight load of an MB missing from generation. Concurrent callers for the
+        same MB await one shared load while different MBs load in parallel.
+        A cancelled caller does not cancel the load.
+        With use_snapshot, MBs loaded here after the snapshot was written (e.g. STREAM_MBS like
+        BossBattleEnemyMB) are not added to it and stay per worker, read from the disk cache.
+        They are only shared once a snapshot of a later version is written by a worker that has them loaded.
+        '''
+        key = (generation.version, mb)
+        task = self.loading.get(key)
+        if task is None:
+            async def load() -> LoadedMB:
+                loaded = generation.mbs.setdefault(mb, await self._load_mb(mb, generation.catalog))
+                if self.current.version == generation.version:
+                    self.current.mbs.setdefault(mb, loaded)
+                return loaded
+            task = asyncio.create_task(load())
+            self.loading[key] = task
+            task.add_done_callback(lambda _: self.loading.pop(key, None))
+        return await asyncio.shield(task)
 
     async def load_MB(self, mb_list: str|list[str]):
+        '''Reloads MBs into a new generation'''
         if isinstance(mb_list, str):
             mb_list = [mb_list]
         await self.update_version()  # don't lock while locking
         async with self.lock:
-            tasks = [
-                self._fetch_and_store_mb(mb)
-                for mb in mb_list
-            ]
-            await asyncio.gather(*tasks)
+            current = self.current
+            loaded = await asyncio.gather(*(self._load_mb(mb, current.catalog) for mb in mb_list))
+            self._publish(Generation(current.version, current.catalog, {**current.mbs, **dict(zip(mb_list, loaded))}))
+
+    async def _get_loaded(self, mb: str) -> LoadedMB:
+        generation = self.generation
+        if generation.version is None:  # would be only in testing env
+            generation = Generation(await self._fetch_version(), generation.catalog, generation.mbs)
+            self._publish(generation)
+        loaded = generation.mbs.get(mb)
+        if loaded is None:
+            loaded = await self._load_missing_mb(generation, mb)
+            logger.info(f'Added {mb} - {generation.version}')
+        return loaded
 
     async def get_MB(self, mb: str):
-        if self.version is None:  # would be only in testing env
-            self.version = await self._fetch_version()
-        if mb not in self.data:
-            async with self.lock:
-                await self._fetch_and_store_mb(mb)
-                logger.info(f'Added {mb} - {self.version}')
-        return self.data[mb]
+        loaded = await self._get_loaded(mb)
+        return loaded.data
 
     async def update_version(self) -> list[str]:
         new_version = await self._fetch_version()
-        if new_version == self.version:
+        if new_version == self.current.version:
             return []
 
-        logger.info(f'Updating Version to {new_version}')
-        updates = []
-        new_catalog = await self._fetch_catalog()
-
         async with self.lock:
-            tasks = []
+            if new_version == self.current.version:  # published by a concurrent update while waiting
+                return []
+            logger.info(f'Updating Version to {new_version}')
+            new_catalog = await self._fetch_catalog()
+
+            # let in-flight loads land so they are included in the diff below
+            await asyncio.gather(*(asyncio.shield(task) for task in list(self.loading.values())), return_exceptions=True)
+            current = self.current
+
+            updates = []
             for mb, new_data in new_catalog.items():
-                if mb not in self.data:
-                    continue
-                if new_data['Hash'] != self.catalog.get(mb, {}).get('Hash'):
-                    tasks.append(self._fetch_and_store_mb(mb))
+                if mb in current.mbs and new_data['Hash'] != current.catalog.get(mb, {}).get('Hash'):
                     updates.append(mb)
                     logger.info(f'Updating {mb} - {new_version}')
-            await asyncio.gather(*tasks)
 
-            self.version = new_version
-            self.catalog = new_catalog
+            # another worker may have already written this version
+            snapshot_generation = await self._snapshot_generation(new_version) if self.use_snapshot else None
+            fetched = [mb for mb in updates if snapshot_generation is None or mb not in snapshot_generation.mbs]
+            loaded = await asyncio.gather(*(self._load_mb(mb, new_catalog) for mb in fetched))
+
+            # build the new generation off to the side and swap it in at once
+            mbs = {**current.mbs, **dict(zip(fetched, loaded))}
+            if snapshot_generation is not None:
+                mbs.update(snapshot_generation.mbs)
+            generation = Generation(new_version, new_catalog, mbs)
+
+            if self.use_snapshot and snapshot_generation is None:
+                async with self._file_lock('snapshot.lock'):
+                    generation = (
+                        await self._snapshot_generation(new_version, generation)
+                        or await self._save_snapshot(generation)
+                    )
+            self._publish(generation)
             logger.info('Done updating')
         return updates
 
+    async def poll(self, on_update: Callable[[list[str]], Awaitable[None]]) -> None:
+        '''
+        Checks for a new version every POLL_INTERVAL plus jitter until cancelled.
+        A check costs one conditional request while nothing changed.
+        Every worker swaps in new versions but only one calls on_update with the updated MBs.
+        '''
+        while True:
+            await asyncio.sleep(self.POLL_INTERVAL + random.uniform(0, self.POLL_JITTER))
+            try:
+                updated = await self.update_version()
+                if updated and self._is_poll_leader():
+                    await self.apply_update(updated, on_update)
+            except Exception as e:
+                logger.error(f'Failed to poll master version: {e}')
+
+    def _read_applied_version(self) -> str|None:
+        try:
+            return (self.cache_dir / 'applied.version').read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_applied_version(self, version: str) -> None:
+        path = self.cache_dir / 'applied.version'
+        tmp_path = self._tmp_cache_path(path)
+        tmp_path.write_text(version)
+        os.replace(tmp_path, path)
+
+    async def apply_update(self, updated: list[str], on_update: Callable[[list[str]], Awaitable[None]]) -> bool:
+        '''
+        Calls on_update once per master version across all workers and manual updates.
+        The last applied version is kept next to the poll lock and checked under a file lock,
+        so a version applied by one worker is skipped by the others. Returns False if skipped.
+        '''
+        version = self.current.version
+        async with self._file_lock('apply.lock'):
+            if await asyncio.to_thread(self._read_applied_version) == version:
+                logger.info(f'Update already applied - {version}')
+                return False
+            await on_update(updated)
+            await asyncio.to_thread(self._write_applied_version, version)
+        return True
+
+    def _is_poll_leader(self) -> bool:
+        '''Non-blocking file lock kept until close. Taken over by another worker if the holder exits.'''
+        if self.poll_lock_file is None:
+            f = open(self.cache_dir / 'poll.lock', 'wb')
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()
+                return False
+            self.poll_lock_file = f
+        return True
+
     async def search_id(self, id: int, mb: str) -> dict|None:
-        mb_data = await self.get_MB(mb)
-        return next((item for item in mb_data if item["Id"] == id), None)
+        loaded = await self._get_loaded(mb)
+        return loaded.id_index.get(id)
 
     async def search_filter(self, mb: str, **filter_args) -> Iterator[dict]:
         '''
@@ -139,11 +627,29 @@ class MasterData:
             - 4: Emerald
             - 5: Amber
         - Floor (int)
+
+        Uses the largest index in INDEXES covered by filter_args and
+        filters the remaining args. Scans the whole MB if no index fits.
         '''
-        mb_data = await self.get_MB(mb)
+        loaded = await self._get_loaded(mb)
+        mb_data = loaded.data
+        best_keys = max(
+            (keys for keys in loaded.indexes if filter_args.keys() >= set(keys)),
+            key=len,
+            default=None
+        )
+        if best_keys is not None:
+            mb_data = loaded.indexes[best_keys].get(tuple(filter_args[key] for key in best_keys), [])
+            filter_args = {key: value for key, value in filter_args.items() if key not in best_keys}
+            if not filter_args:
+                return iter(mb_data)
         return filter(lambda item: all(item.get(key) == value for key, value in filter_args.items()), mb_data)
 
-    async def search_consecutive(self, mb: str, key, minvalue) -> Iterator[dict]:
-        mb_data = await self.get_MB(mb)
-        return filter(lambda item: item.get(key) >= minvalue, mb_data)
+    async def search_range(self, mb: str, key: str, minvalue, maxvalue=None) -> list[dict]:
+        '''Rows with minvalue <= key <= maxvalue sorted by key. No upper bound if maxvalue is None.'''
+        loaded = await self._get_loaded(mb)
+        values, rows = self._get_sorted_index(loaded, key)
+        start = bisect_left(values, minvalue)
+        end = len(values) if maxvalue is None else bisect_right(values, maxvalue)
+        return rows[start:end]
     
\ No newline at end of file
@@ -0,0 +1,138 @@
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Iterator, Mapping, Sequence
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import msgpack
+
+# File layout
+# MAGIC | header offset (uint64) | per MB: msgpack rows, padding, row offsets (uint64 * (count + 1)) | msgpack header
+# header = {'version': str, 'catalog': dict, 'mbs': {mb: [offsets position, row count, ids, indexes]}}
+# ids = [[Id, row position], ...], indexes = [[keys, [[values, [row positions]], ...]], ...]
+MAGIC = b'AASNAP02'
+# decoded rows kept per MB, enough for repeated key access while scanning
+ROW_CACHE_SIZE = 256
+_HEADER_OFFSET = struct.Struct('<Q')
+
+def _index_positions(rows: Sequence[Mapping], keys: tuple[str, ...]) -> list:
+    index = {}
+    for i, row in enumerate(rows):
+        index.setdefault(tuple(row.get(key) for key in keys), []).append(i)
+    return [[list(values), positions] for values, positions in index.items()]
+
+def write_snapshot(
+    path: Path,
+    version: str,
+    catalog: dict,
+    data: dict[str, Sequence[Mapping]],
+    index_keys: dict[str, set[tuple[str, ...]]]|None = None
+) -> None:
+    '''
+    Writes MB data to path atomically. Rows can be any mapping.
+    The Id index and the indexes of index_keys are stored as row positions
+    so readers don't have to decode every row to build them.
+    '''
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    packer = msgpack.Packer()
+    index_keys = index_keys or {}
+    mbs = {}
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(_HEADER_OFFSET.pack(0))  # placeholder
+            for mb, rows in data.items():
+                offsets = array('Q', [f.tell()])
+                ids = {}
+                for i, row in enumerate(rows):
+                    f.write(packer.pack(row if isinstance(row, dict) else dict(row)))
+                    offsets.append(f.tell())
+                    ids.setdefault(row.get('Id'), i)  # first row wins, same as MasterData
+                f.write(b'\0' * (-f.tell() % 8))  # align offsets
+                indexes = [[list(keys), _index_positions(rows, keys)] for keys in index_keys.get(mb, ())]
+                mbs[mb] = [f.tell(), len(offsets) - 1, list(ids.items()), indexes]
+                offsets.tofile(f)
+            header_offset = f.tell()
+            f.write(packer.pack({'version': version, 'catalog': catalog, 'mbs': mbs}))
+            f.seek(len(MAGIC))
+            f.write(_HEADER_OFFSET.pack(header_offset))
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+class SnapshotRow(Mapping):
+    '''Read only dict-like view of a snapshot row. Decoded from the mapped file on access, never kept.'''
+    __slots__ = ('_mb', '_i')
+
+    def __init__(self, mb: 'SnapshotMB', i: int) -> None:
+        self._mb = mb
+        self._i = i
+
+    def __getitem__(self, key: str) -> Any:
+        return self._mb.decode(self._i)[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._mb.decode(self._i).get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._mb.decode(self._i)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._mb.decode(self._i))
+
+    def __len__(self) -> int:
+        return len(self._mb.decode(self._i))
+
+    def __repr__(self) -> str:
+        return repr(self._mb.decode(self._i))
+
+class SnapshotMB(Sequence):
+    '''
+    MB backed by a memory mapped snapshot. Row bytes, offsets and index positions
+    stay in the shared mapping. Rows are decoded on access and only the last
+    ROW_CACHE_SIZE decoded rows are kept in process memory.
+    '''
+    def __init__(self, buffer: memoryview, offsets: memoryview, count: int, ids: list, indexes: list) -> None:
+        self._buffer = buffer
+        self._offsets = offsets
+        self.decode = lru_cache(maxsize=ROW_CACHE_SIZE)(self._decode)
+        self._rows = rows = [SnapshotRow(self, i) for i in range(count)]
+        # built from the stored row positions without decoding any row
+        self.id_index: dict[Any, SnapshotRow] = {id: rows[i] for id, i in ids}
+        self.indexes: dict[tuple[str, ...], dict[tuple, list[SnapshotRow]]] = {
+            tuple(keys): {tuple(values): [rows[i] for i in positions] for values, positions in index}
+            for keys, index in indexes
+        }
+
+    def _decode(self, i: int) -> dict:
+        return msgpack.unpackb(self._buffer[self._offsets[i]:self._offsets[i+1]])
+
+    def __getitem__(self, i):
+        return self._rows[i]
+
+    def __iter__(self) -> Iterator[SnapshotRow]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+class Snapshot:
+    '''Read only memory mapped snapshot. Pages are shared between every process mapping the same file.'''
+    def __init__(self, path: Path) -> None:
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} is not a MasterData snapshot')
+        buffer = memoryview(self._mmap)
+        header_offset, = _HEADER_OFFSET.unpack_from(self._mmap, len(MAGIC))
+        header = msgpack.unpackb(buffer[header_offset:])
+        self.version: str = header['version']
+        self.catalog: dict = header['catalog']
+        self.mbs: dict[str, SnapshotMB] = {
+            mb: SnapshotMB(buffer, buffer[pos:pos + 8*(count+1)].cast('Q'), count, ids, indexes)
+            for mb, (pos, count, ids, indexes) in header['mbs'].items()
+        }
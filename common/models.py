@@ -101,6 +101,14 @@ class GuildORM(Base):
     def world(cls):
         return cls.world_id % 1000
 
+class RankingFetchORM(Base):
+    __tablename__ = "ranking_fetches"
+
+    # time each world was last fetched, players and guilds only keep the time they last changed
+    world_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    player_timestamp: Mapped[int|None] = mapped_column(BigInteger)
+    guild_timestamp: Mapped[int|None] = mapped_column(BigInteger)
+
 class StringORM(Base):
     __tablename__ = 'string_keys'
 
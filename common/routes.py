@@ -12,6 +12,8 @@ CHARACTER_MEMORY_PATH = "/character/memory/{char_id}"
 CHARACTER_ALTS_PATH = "/character/alts"
 CHARACTER_ALTS_ID_PATH = "/character/alts/{char_id}"
 CHARACTER_POTENTIAL_PATH = "/character/potential"
+CHARACTER_STATS_PATH = "/character/stats"
+CHARACTER_LEVEL_LINK_PATH = "/character/levellink"
 ITEM_PATH = "/item/search"
 ITEM_RUNE_PATH = "/item/rune"
 ITEM_RUNE_CATEGORY_PATH = "/item/rune/{category}"
@@ -19,6 +21,7 @@ EQUIPMENT_PATH = "/equipment/{eqp_id}"
 EQUIPMENT_SEARCH_PATH = "/equipment/search"
 EQUIPMENT_UW_SEARCH_PATH = "/equipment/unique/search"
 EQUIPMENT_UPGRADE_PATH = "/equipment/upgrade"
+EQUIPMENT_PLAN_PATH = "/equipment/plan"
 MASTER_PATH = "/master/{mb}"
 GACHA_PATH = "/gacha"
 QUEST_PATH = "/quest/{quest_id}"
@@ -194,6 +194,25 @@ class Arcana(APIBaseModel):
     end: str = Field(..., validation_alias='EndTimeFixJST', pattern=r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$', description='JST')
     required_level: int = Field(..., validation_alias='RequiredPartyLv', description='Required level link to unlock arcana')
 
+class CharacterBaseStats(APIBaseModel):
+    char_id: int
+    speed: int
+    str: list[int] = Field(..., description='Stat for each level in levels')
+    dex: list[int]
+    mag: list[int]
+    sta: list[int]
+
+class BaseStatTable(APIBaseModel):
+    rarity: enums.CharacterRarity
+    levels: list[str] = Field(..., description='Levels in the format "*Level*.*SubLevel*"')
+    characters: list[CharacterBaseStats]
+
+class LevelLinkCost(APIBaseModel):
+    start: str = Field(..., description='"*Level*.*SubLevel*"')
+    end: str = Field(..., description='"*Level*.*SubLevel*"')
+    max_level: int = Field(..., description='Highest level link level')
+    cost: list[ItemCount]
+
 class CoefficientInfo(APIBaseModel):
     m: float
     b: int
@@ -290,6 +309,7 @@ class EquipmentUpgradeLevel(APIBaseModel):
 class EquipmentUpgradeData(APIBaseModel):
     is_weapon: bool
     upgrades: list[EquipmentUpgradeLevel]  
+    total_cost: list[ItemCount] = Field([], description='Sum of all upgrade costs')
 
 class EquipmentEnhanceLevel(APIBaseModel):
     before_level: int = Field(..., validation_alias='BeforeEquipmentLv')
@@ -312,6 +332,20 @@ class EquipmentCosts(APIBaseModel):
     enhance_costs: list[EquipmentEnhanceLevel] = Field(..., description='Cost to increase equipment level')
     rarity_enhance_costs: list[EquipmentEnhanceRarity] = Field(..., description='Cost to upgrade equipment rarity')
 
+class EquipmentPlanCost(APIBaseModel):
+    equip_id: int
+    rarity: enums.ItemRarity
+    level: int
+    upgrade: int
+    synthesis_cost: list[ItemCount] = Field(..., description='Cost to create equipment, empty if already owned')
+    enhance_cost: list[ItemCount] = Field(..., description='Cost to increase equipment level and rarity')
+    upgrade_cost: list[ItemCount] = Field(..., description='Cost to upgrade equipment')
+    total_cost: list[ItemCount]
+
+class EquipmentPlan(APIBaseModel):
+    pieces: list[EquipmentPlanCost]
+    total_cost: list[ItemCount] = Field(..., description='Sum of all piece costs')
+
 # Gacha
 class GachaPickup(APIBaseModel):
     gacha_case_id: int|None = Field(..., validation_alias='Id', description='IoC and IoSG will be null due to data limitations and optimization purposes. Refer to following instead. IoC normal soul(7), IoC radiant/chaos (8), IoSG normal soul (10000), IoSG radiant/chaos (20000) ')
@@ -579,6 +613,7 @@ class PlayerRankInfo(BaseModel):
     emerald_tower_id: int|None
     amber_tower_id: int|None
     timestamp: int
+    fetch_timestamp: int|None = None
 
     class Config:
         from_attributes = True
@@ -608,6 +643,7 @@ class GuildRankInfo(BaseModel):
     world: int
     bp: int
     timestamp: int
+    fetch_timestamp: int|None = None
 
     class Config:
         from_attributes = True
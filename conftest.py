@@ -0,0 +1,7 @@
+import os
+import tempfile
+from pathlib import Path
+
+# api.utils.logger writes to log/api relative to the working directory, keep it out of the repo
+os.chdir(tempfile.mkdtemp(prefix='aabot-tests-'))
+Path('log/api').mkdir(parents=True)
@@ -0,0 +1,152 @@
+import random
+from itertools import product
+
+import pytest
+
+from api.schemas.character import ArcanaStore, StatTable
+from common import enums, schemas
+
+# Stat tables
+
+def calculate_base_stat(total, m, b, coefficient, gross):
+    '''Per-row stat formula the bot used before StatTable'''
+    return int((total * m + b) * coefficient / gross)
+
+@pytest.fixture
+def potential() -> schemas.CharacterPotential:
+    levels = {f'{level}.0': 2000 + level * 131 for level in range(1, 240)}
+    levels.update({f'{level}.{sub}': 900_000 + level * 7919 + sub * 6697 for level in range(240, 243) for sub in range(10)})
+    return schemas.CharacterPotential(
+        levels=levels,
+        coefficients={
+            1: {enums.CharacterRarity.N: {'m': 1.0, 'b': 0}, enums.CharacterRarity.LR: {'m': 1.35, 'b': 250}},
+            2: {enums.CharacterRarity.R: {'m': 1.1, 'b': 10}, enums.CharacterRarity.LR: {'m': 1.45, 'b': 300}},
+            8: {enums.CharacterRarity.SR: {'m': 1.2, 'b': 20}},
+        }
+    )
+
+@pytest.fixture
+def characters() -> list[dict]:
+    rng = random.Random(0)
+    return [
+        {
+            'Id': char_id,
+            'RarityFlags': rarity,
+            'InitialBattleParameter': {'Speed': rng.randint(3000, 4000)},
+            'BaseParameterCoefficient': {key: rng.randint(5, 40) for key in ('Muscle', 'Energy', 'Intelligence', 'Health')},
+            'BaseParameterGrossCoefficient': rng.randint(80, 120),
+        }
+        for char_id, rarity in zip(range(1, 13), [1, 2, 8] * 4)
+    ]
+
+def reference_stats(potential, characters, rarity, levels, char_ids):
+    '''{char_id: [str, dex, mag, sta] per level} computed row by row'''
+    by_id = {character['Id']: character for character in characters}
+    stats = {}
+    for char_id in char_ids:
+        character = by_id[char_id]
+        info = potential.coefficients.get(character['RarityFlags'], {}).get(rarity)
+        if info is None:
+            continue
+        coefficients = character['BaseParameterCoefficient']
+        stats[char_id] = [
+            [
+                calculate_base_stat(potential.levels[level], info.m, info.b, coefficients[key], character['BaseParameterGrossCoefficient'])
+                for level in levels
+            ]
+            for key in ('Muscle', 'Energy', 'Intelligence', 'Health')
+        ]
+    return stats
+
+@pytest.mark.parametrize('rarity, start, end, char_ids', [
+    (enums.CharacterRarity.LR, '240.0', '242.9', None),
+    (enums.CharacterRarity.LR, '1.0', '10.0', [2, 1, 5]),
+    (enums.CharacterRarity.SR, '239.0', '240.4', None),
+    (enums.CharacterRarity.N, '120.0', '120.0', [1, 2]),
+])
+def test_stat_table_matches_row_formula(potential, characters, rarity, start, end, char_ids):
+    table = StatTable(potential, characters)
+    result = table.compute(rarity, start, end, char_ids)
+
+    start_i, end_i = table.levels.index(start), table.levels.index(end)
+    assert result.levels == table.levels[start_i:end_i + 1]
+    expected = reference_stats(
+        potential, characters, rarity, result.levels,
+        char_ids if char_ids is not None else [character['Id'] for character in characters]
+    )
+    assert [stats.char_id for stats in result.characters] == list(expected)
+    for stats in result.characters:
+        assert [stats.str, stats.dex, stats.mag, stats.sta] == expected[stats.char_id]
+
+# Arcana
+
+def check_parameter(parameter, category, parameter_type, change_type) -> bool:
+    if category is not None and category != parameter.category:
+        return False
+    if parameter_type is not None and parameter_type != parameter.type:
+        return False
+    if change_type is not None and change_type != parameter.change_type:
+        return False
+    return True
+
+def filter_arcana(arcanas, character=None, parameter_category=None, parameter_type=None, parameter_change_type=None, has_level_bonus=None):
+    '''Per-row filter of get_arcana before ArcanaStore'''
+    result = []
+    for arcana in arcanas:
+        if character and character not in arcana.characters:
+            continue
+        if arcana.levels:
+            if parameter_category is not None or parameter_type is not None or parameter_change_type is not None:
+                if not any(check_parameter(param, parameter_category, parameter_type, parameter_change_type) for param in arcana.levels[-1].parameters):
+                    continue
+            if has_level_bonus is not None:
+                if (arcana.levels[-1].level_bonus > 0) != has_level_bonus:
+                    continue
+        result.append(arcana)
+    return result
+
+@pytest.fixture
+def arcanas() -> list[schemas.Arcana]:
+    rng = random.Random(0)
+    arcanas = []
+    for arcana_id in range(1, 31):
+        levels = []
+        for level in range(1, rng.choice([0, 1, 3, 5]) + 1):
+            levels.append({
+                'Id': arcana_id * 10 + level,
+                'CollectionId': arcana_id,
+                'CollectionLevel': level,
+                'BaseParameterChangeInfos': [
+                    {'BaseParameterType': rng.randint(1, 4), 'ChangeParameterType': rng.randint(1, 3), 'Value': 100}
+                    for _ in range(rng.randint(0, 2))
+                ],
+                'BattleParameterChangeInfos': [
+                    {'BattleParameterType': rng.randint(1, 5), 'ChangeParameterType': rng.randint(1, 3), 'Value': 100}
+                    for _ in range(rng.randint(0, 2))
+                ],
+                'CharacterRarityFlags': 32,
+                'CharacterRarityBonus': 0,
+                'MaxLevelIncreaseValue': rng.choice([0, 0, 1]),
+            })
+        arcanas.append(schemas.Arcana(
+            Id=arcana_id,
+            NameKey=f'[CharacterCollectionName{arcana_id}]',
+            RequiredCharacterIds=rng.sample(range(1, 11), rng.randint(2, 4)),
+            levels=levels,
+            StartTimeFixJST='2024-01-01 00:00:00',
+            EndTimeFixJST='2100-01-01 00:00:00',
+            RequiredPartyLv=0,
+        ))
+    return arcanas
+
+def test_arcana_store_matches_row_filter(arcanas):
+    store = ArcanaStore(arcanas)
+    filters = product(
+        [None, 1, 4, 10, 99],
+        [None, enums.ParameterCategory.Base, enums.ParameterCategory.Battle],
+        [None, 1, 3],
+        [None, *enums.ParameterChangeType],
+        [None, True, False],
+    )
+    for args in filters:
+        assert store.search(*args) == filter_arcana(arcanas, *args), args
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from api.schemas.costs import CostTable, LevelLinkTable
+
+def sum_steps(steps: list[list[dict]], start: int, end: int) -> list[dict]:
+    '''Per-row total of steps start to end-1, as summed before the prefix tables'''
+    totals: dict[tuple[int, int], int] = {}
+    for items in steps[start:end]:
+        for item in items:
+            key = (item['ItemType'], item['ItemId'])
+            totals[key] = totals.get(key, 0) + item['ItemCount']
+    return [
+        {'ItemId': item_id, 'ItemType': item_type, 'ItemCount': count}
+        for (item_type, item_id), count in totals.items() if count
+    ]
+
+def as_counts(items: list[dict]) -> dict[tuple[int, int], int]:
+    return {(item['ItemType'], item['ItemId']): item['ItemCount'] for item in items}
+
+@pytest.fixture
+def steps() -> list[list[dict]]:
+    rng = random.Random(0)
+    return [
+        [
+            {'ItemId': item_id, 'ItemType': item_type, 'ItemCount': rng.randint(1, 10_000)}
+            for item_type, item_id in rng.sample([(3, 1), (11, 1), (11, 2), (12, 5)], rng.randint(0, 3))
+        ]
+        for _ in range(40)
+    ]
+
+def test_cost_table_matches_row_sums(steps):
+    table = CostTable(steps)
+    assert len(table) == len(steps)
+    for start in range(len(steps) + 1):
+        for end in range(start, len(steps) + 1):
+            assert as_counts(table.cost(start, end)) == as_counts(sum_steps(steps, start, end))
+
+def test_cost_table_empty_range_and_steps():
+    assert CostTable([]).cost(0, 0) == []
+    assert CostTable([[{'ItemId': 1, 'ItemType': 3, 'ItemCount': 5}]]).cost(1, 1) == []
+
+def test_level_link_table_matches_row_walk(steps):
+    link_data = [
+        {'PartyLevel': 240 + i // 10, 'PartySubLevel': i % 10, 'RequiredLevelUpItems': items}
+        for i, items in enumerate(steps)
+    ]
+    table = LevelLinkTable(link_data)
+    assert table.max_level == 243
+    # fully linked up to max level + 1
+    assert as_counts(table.cost((240, 0), (244, 0))) == as_counts(sum_steps(steps, 0, len(steps)))
+    assert as_counts(table.cost((241, 3), (242, 7))) == as_counts(sum_steps(steps, 13, 27))
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from api.schemas.items import ItemResolver, get_item_resolver
+from api.utils.error import APIError
+from api.utils.masterdata import MasterData
+from common import enums, schemas
+
+def item_row(id: int, item_id: int, item_type: int, **kwargs) -> dict:
+    return {
+        'Id': id, 'ItemId': item_id, 'ItemType': item_type, 'NameKey': f'[ItemName{id}]', 'DescriptionKey': f'[ItemDescription{id}]',
+        'IconId': id, 'ItemRarityFlags': 1, 'MaxItemCount': 0, 'SecondaryFrameNum': 2, 'SecondaryFrameType': 0, 'DisplayName': 'x',
+        **kwargs
+    }
+
+MBS = {
+    'ItemMB': [
+        item_row(1, 1, enums.ItemType.Gold),
+        item_row(2, 1, enums.ItemType.QuestQuickTicket),
+        item_row(3, 2, enums.ItemType.QuestQuickTicket),
+        item_row(4, 1, enums.ItemType.CharacterTrainingMaterial),
+        item_row(5, 1, enums.ItemType.EquipmentFragment),  # dedicated type, resolved from EquipmentCompositeMB
+        item_row(6, 3, enums.ItemType.CharacterTrainingMaterial, NameKey=None),  # fails validation
+    ],
+    'EquipmentCompositeMB': [
+        {'Id': 1, 'EquipmentId': 7, 'NameKey': '[F]', 'DescriptionKey': '[D]', 'IconId': 0, 'RequiredFragmentCount': 30, 'ItemRarityFlags': 128, 'RequiredItemList': []},
+    ],
+    'EquipmentMB': [{'Id': 7, 'IconId': 77, 'NameKey': '[EquipmentName7]'}],
+    'CharacterMB': [{'Id': 1, 'NameKey': '[CharacterName1]', 'Name2Key': None, 'DescriptionKey': '[D]', 'IconId': 0, 'RarityFlags': 1, 'ItemId': 1, 'ItemType': 6}],
+    'EquipmentSetMaterialMB': [],
+    'SphereMB': [],
+    'TreasureChestMB': [],
+}
+
+async def lookup_item(md: MasterData, item_type: int, item_id: int) -> schemas.ItemBase:
+    '''Per-type lookup of get_item before ItemResolver'''
+    try:
+        if item_type == enums.ItemType.EquipmentFragment:
+            equip_frag_data = await md.search_id(item_id, 'EquipmentCompositeMB')
+            equip_data = await md.search_id(equip_frag_data['EquipmentId'], 'EquipmentMB')
+            return schemas.EquipmentFragment(**equip_frag_data, icon=equip_data['IconId'], equip_name=equip_data['NameKey'])
+        elif item_type == enums.ItemType.Character:
+            return schemas.CharacterItem(**await md.search_id(item_id, 'CharacterMB'))
+        elif item_type == enums.ItemType.CharacterFragment:
+            return schemas.CharacterFragment(**await md.search_id(item_id, 'CharacterMB'))
+        item_data = next(await md.search_filter('ItemMB', ItemId=item_id, ItemType=item_type))
+        if item_type == enums.ItemType.QuestQuickTicket:
+            return schemas.QuickTicket(**item_data)
+        return schemas.ItemBase(**item_data)
+    except (TypeError, StopIteration):
+        raise APIError('Item could not be found.')
+
+@pytest.fixture
+def md(tmp_path):
+    source = tmp_path / 'Master'
+    source.mkdir()
+    (source / 'version').write_text('v1')
+    for mb, rows in MBS.items():
+        (source / f'{mb}.json').write_text(json.dumps(rows))
+    return MasterData(source=str(source), cache_dir=tmp_path / 'cache')
+
+def test_item_resolver_matches_per_type_lookup(md):
+    async def compare():
+        resolver = await get_item_resolver(md)
+        keys = [
+            (item_type, item_id)
+            for item_type in (*ItemResolver.DEDICATED_TYPES, enums.ItemType.Gold, enums.ItemType.QuestQuickTicket, 99)
+            for item_id in range(0, 4)
+            if (item_type, item_id) != (enums.ItemType.CharacterTrainingMaterial, 3)
+        ] + [(enums.ItemType.CharacterTrainingMaterial, 1)]
+        for item_type, item_id in keys:
+            try:
+                expected = await lookup_item(md, item_type, item_id)
+            except APIError:
+                with pytest.raises(APIError):
+                    resolver.resolve(item_type, item_id)
+                continue
+            assert resolver.resolve(item_type, item_id) == expected, (item_type, item_id)
+
+        # the ItemMB row of a dedicated type does not shadow its own MB
+        fragment = resolver.resolve(enums.ItemType.EquipmentFragment, 1)
+        assert isinstance(fragment, schemas.EquipmentFragment) and fragment.equip_name == '[EquipmentName7]'
+
+        # a row failing validation is skipped instead of failing the whole resolver
+        with pytest.raises(ValidationError):
+            await lookup_item(md, enums.ItemType.CharacterTrainingMaterial, 3)
+        with pytest.raises(APIError):
+            resolver.resolve(enums.ItemType.CharacterTrainingMaterial, 3)
+
+        # resolved items are copies
+        fragment.name = 'changed'
+        assert resolver.resolve(enums.ItemType.EquipmentFragment, 1).name != 'changed'
+        await md.close()
+    asyncio.run(compare())